@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmarks for the simulation and rendering hot paths of stocks.py.
+
+    python benchmarks.py                     # run everything, print a table
+    python benchmarks.py --json out.json     # also write machine-readable results
+    python benchmarks.py --save-baseline     # store results as the baseline
+    python benchmarks.py --compare           # exit 1 on regressions vs the baseline
+
+yfinance is replaced by an empty stub so nothing touches the network.
+Tk benchmarks run against a withdrawn root; without $DISPLAY an Xvfb
+server is started when available, otherwise they are reported as skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import types
+
+sys.modules.setdefault("yfinance", types.ModuleType("yfinance"))
+
+import numpy as np
+
+import stocks
+
+BASELINE_PATH   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+UNIVERSES       = (30, 500, 5000)
+HISTORY_LENGTHS = (10, 1000, 100000)
+MAX_HISTORY_MB  = 256     # history x universe combinations larger than this are skipped
+THRESHOLD       = 0.25    # allowed slowdown before --compare fails
+
+# -------------------------------- helpers ---------------------------------------------
+
+def make_universe(n):
+    if n <= len(stocks.STOCKS):
+        return dict(list(stocks.STOCKS.items())[:n])
+    return {f"S{i:05d}": f"Synthetic Stock {i}" for i in range(n)}
+
+def fill_history(engine, days):
+    # A geometric random walk stands in for `days` simulated days
+    rng = np.random.default_rng(days)
+    steps = rng.uniform(*stocks.GROWTH_RANGE, size=(days, len(engine.symbols)))
+    data = np.cumprod(steps, axis=0) * engine.prices
+    engine.history = stocks.PriceHistory.from_buffer(
+        engine.symbols, data, 1, data.min(axis=0), data.max(axis=0), max_days=None)
+    engine.prices[:] = data[-1]
+    engine.day = days
+
+def history_fits(days, universe):
+    return days * universe * 8 <= MAX_HISTORY_MB * 2**20
+
+def measure(fn, setup=None, min_time=0.2, max_calls=10000):
+    """Median seconds per call of fn(), over at least ``min_time`` seconds."""
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_calls and (len(samples) < 3 or time.perf_counter() - start < min_time):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+def start_display():
+    # Returns (available, reason, process to stop afterwards)
+    if os.environ.get("DISPLAY"):
+        return True, None, None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return False, "no $DISPLAY and Xvfb is not installed", None
+    display = ":97"
+    proc = subprocess.Popen([xvfb, display, "-screen", "0", "1920x1080x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return True, None, proc
+
+# -------------------------------- headless benchmarks ----------------------------
+
+def bench_headless(results, quick):
+    for n in UNIVERSES[:2] if quick else UNIVERSES:
+        universe = make_universe(n)
+
+        engine = stocks.MarketEngine(universe, bank=stocks.Bank(), seed=1)
+        results[f"random_fluctuations[symbols={n}]"] = measure(engine.step)
+
+        portfolio = stocks.Portfolio(cash=1e12, symbols=universe)
+        sym = next(iter(universe))
+        portfolio.buy(sym, 10**6, 1.0)      # enough shares for every timed sell
+        results[f"Portfolio.buy[symbols={n}]"] = measure(lambda: portfolio.buy(sym, 1, 1.0))
+        results[f"Portfolio.sell[symbols={n}]"] = measure(lambda: portfolio.sell(sym, 1, 1.0))
+        results[f"net_worth[symbols={n}]"] = measure(
+            lambda: stocks.net_worth(portfolio, engine.bank, engine))
+
+        source = stocks.StubPriceSource(latency=0.0, seed=1)
+        def fetch():
+            loader = stocks.PriceLoader(universe, source=source).start()
+            loader.thread.join()
+        results[f"fetch_prices[symbols={n}]"] = measure(fetch, min_time=0.5, max_calls=20)
+
+# -------------------------------- Tk benchmarks ----------------------------------
+
+def make_game(universe, days):
+    game = stocks.StockTreasureGame(universe=universe, price_source=stocks.StubPriceSource(0.0),
+                                    seed=1, log_path=None)
+    game.withdraw()
+    game.build_panels()     # a withdrawn window is never mapped, so build them here
+    if game.loader is not None:
+        game.loader.thread.join()
+        game._poll_prices()     # apply the quotes and unlock the day controls
+    fill_history(game.engine, days)
+    held = list(universe)[:10]
+    for sym in held:
+        game.portfolio.buy(sym, 1, game.engine.price(sym))
+    game.update()
+    return game
+
+def bench_tk(results, quick):
+    for n in UNIVERSES[:2] if quick else UNIVERSES:
+        universe = make_universe(n)
+        for days in HISTORY_LENGTHS[:2] if quick else HISTORY_LENGTHS:
+            if not history_fits(days, n):
+                continue
+            game = make_game(universe, days)
+            tag = f"symbols={n},days={days}"
+            try:
+                def all_dirty():
+                    game.engine.dirty[:] = True
+                results[f"refresh_view[{tag}]"] = measure(game.refresh_view, setup=all_dirty)
+
+                game.zoom_var.set(False)
+                results[f"draw_chart[{tag}]"] = measure(game.draw_chart, setup=lambda: setattr(game.chart, "key", None))
+                game.zoom_var.set(True)
+                results[f"draw_chart_all_days[{tag}]"] = measure(game.draw_chart, setup=lambda: setattr(game.chart, "key", None))
+                game.zoom_var.set(False)
+
+                def step():
+                    game.next_day()
+                    game.update()
+                results[f"next_day[{tag}]"] = measure(step)
+            finally:
+                game.destroy()
+
+    game = make_game(make_universe(30), 10)
+    try:
+        def log_burst():
+            for i in range(100):
+                game.add_log(f"benchmark line {i}")
+            game.game_log.flush()
+        results["add_log_x100"] = measure(log_burst)
+    finally:
+        game.destroy()
+
+# -------------------------------- reporting ---------------------------------------
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        if name not in results:
+            continue
+        ratio = results[name] / base if base else 1.0
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:55s} {base*1e6:12.1f}us -> {results[name]*1e6:12.1f}us  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--json", metavar="PATH", help="write results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results, skipped = {}, {}
+    bench_headless(results, args.quick)
+    ok, reason, xvfb = start_display()
+    try:
+        if ok:
+            bench_tk(results, args.quick)
+        else:
+            skipped["tk"] = reason
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "skipped": skipped,
+        "results": results,
+    }
+    for name, secs in results.items():
+        print(f"{name:55s} {secs*1e6:12.1f}us")
+    for name, why in skipped.items():
+        print(f"skipped {name} benchmarks: {why}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
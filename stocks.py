@@ -1,486 +1,2853 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import random
-import yfinance as yf
-
-# ---------------------------------- constants --------------------------------
-
-STARTING_CASH = 25000.0
-TARGET_NET_WORTH = 5000000.0
-ANNUAL_BANK_RATE = 0.05
-LOAN_INTEREST     = 0.05
-MAX_LOAN          = 100000.0
-
-STOCKS = {
-    "AAPL": "Apple Inc.", "MSFT": "Microsoft Corp.", "GOOG": "Alphabet Inc.",
-    "AMZN": "Amazon.com Inc.", "TSLA": "Tesla Inc.", "JPM":  "JP Morgan Chase & Co.",
-    "XOM":  "Exxon Mobil Corp.", "NVDA": "NVIDIA Corp.", "V":    "Visa Inc.",
-    "NFLX": "Netflix Inc.", "DIS":  "The Walt Disney Company", "BAC":  "Bank of America Corp.",
-    "INTC": "Intel Corp.", "KO":   "Coca‑Cola Co.", "PEP":  "PepsiCo Inc.", "SBUX": "Starbucks Corp.",
-    "MCD":  "McDonald’s Corp.", "BA":   "Boeing Co.", "CSCO": "Cisco Systems Inc.", "ADBE": "Adobe Inc.",
-    "PYPL": "PayPal Holdings Inc.", "CRM":  "Salesforce Inc.", "ORCL": "Oracle Corp.",
-    "T":    "AT&T Inc.", "GE":   "General Electric Co.", "HON":  "Honeywell International",
-    "WMT":  "Walmart Inc.", "CVX":  "Chevron Corp.", "F":    "Ford Motor Co.", "GM":   "General Motors Co.",
-}
-
-STOCK_GRAPHICS = {
-    "AAPL": "🍏", "MSFT": "🪟", "GOOG": "🔍", "AMZN": "🛒", "TSLA": "🚗",
-    "JPM":  "🏦", "XOM":  "🛢️", "NVDA": "💻", "V":    "💳", "NFLX": "📺",
-    "DIS":  "🏰", "BAC":  "🏦", "INTC": "🔌", "KO":   "🥤", "PEP":  "🥤",
-    "SBUX": "☕",  "MCD":  "🍔", "BA":   "✈️",  "CSCO": "📡", "ADBE": "🖌️",
-    "PYPL": "💸",  "CRM":  "☁️", "ORCL": "🗃️", "T":    "📞", "GE":   "⚙️",
-    "HON":  "🏭",  "WMT":  "🏬", "CVX":  "⛽",  "F":    "🚙", "GM":   "🚙",
-}
-
-# -------------------------------- events (always positive) -----------------------
-
-COOL_EVENTS = [
-    {"name": "AI Breakthrough!", "desc": "AI beats all benchmarks, tech stocks skyrocket!",
-     "targets": ["AAPL", "MSFT", "GOOG", "NVDA", "ADBE", "CRM", "ORCL"], "factor_range": (1.1, 2.0)},
-    {"name": "Technology Surge", "desc": "Broad tech rally boosts all tech names.",
-     "targets": list(STOCKS.keys()), "factor_range": (1.05, 1.15)},
-    {"name": "Bullish Momentum", "desc": "Strong market momentum pushes all values up.",
-     "targets": list(STOCKS.keys()), "factor_range": (1.02, 1.07)},
-]
-
-FRIENDS_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Avery", "Riley", "Sam"]
-
-# -------------------------------- models -----------------------------------------
-
-class Portfolio:
-    def __init__(self, cash=STARTING_CASH):
-        self.cash = cash
-        self.holdings = {sym: 0 for sym in STOCKS}
-        self.total_paid   = {sym: 0.0 for sym in STOCKS}
-        self.total_bought = {sym: 0 for sym in STOCKS}
-
-    def buy(self, sym, shares, price):
-        if shares <= 0 or shares * price > self.cash:
-            return False, "Invalid share count or insufficient cash."
-        self.cash -= shares * price
-        self.holdings[sym] += shares
-        self.total_paid[sym]   += shares * price
-        self.total_bought[sym] += shares
-        return True, f"Bought {shares} shares of {sym} at ${price:.2f} each (${shares * price:.2f} total)."
-
-    def sell(self, sym, shares, price):
-        if shares <= 0 or shares > self.holdings[sym]:
-            return False, "Invalid share count."
-        proceeds = shares * price
-        self.cash += proceeds
-        self.holdings[sym] -= shares
-        if self.total_bought[sym] > 0:
-            frac = shares / self.total_bought[sym]
-            self.total_paid[sym] -= self.total_paid[sym] * frac
-            self.total_bought[sym] -= shares
-            if self.holdings[sym] == 0 or self.total_bought[sym] == 0:
-                self.total_paid[sym] = 0
-                self.total_bought[sym] = 0
-        return True, f"Sold {shares} shares of {sym} at ${price:.2f} each (${proceeds:.2f} total)."
-
-class Bank:
-    def __init__(self, annual_rate=ANNUAL_BANK_RATE):
-        self.balance = 0.0
-        self.annual_rate = annual_rate
-        self.loan = 0.0
-
-    def deposit(self, amt, avail_cash):
-        if amt <= 0 or amt > avail_cash:
-            return False, "Invalid deposit amount."
-        self.balance += amt
-        return True, f"Deposited ${amt:.2f}."
-
-    def withdraw(self, amt):
-        if amt <= 0 or amt > self.balance:
-            return False, "Invalid withdraw amount."
-        self.balance -= amt
-        return True, f"Withdrew ${amt:.2f}."
-
-    def apply_monthly_interest(self):
-        self.balance *= 1 + self.annual_rate / 12.0
-
-    def borrow(self, amt):
-        if amt <= 0 or self.loan + amt > MAX_LOAN:
-            return False, "Invalid or excessive loan."
-        self.loan += amt
-        return True, f"Borrowed ${amt:.2f}."
-
-    def repay(self, amt, avail_cash):
-        if amt <= 0 or amt > avail_cash:
-            return False, "Invalid or insufficient cash."
-        amt = min(amt, self.loan)
-        self.loan -= amt
-        return True, f"Repaid ${amt:.2f}. Remaining loan: ${self.loan:.2f}"
-
-    def apply_loan_interest(self):
-        if self.loan > 0:
-            inter = self.loan * LOAN_INTEREST
-            self.loan += inter
-            return inter
-        return 0.0
-
-# -------------------------------- UI ---------------------------------------------
-
-class StockTreasureGame(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("🌟 Stock Treasure Game 🌟")
-        self.configure(bg="#16161a")
-        self.attributes("-fullscreen", True)
-
-        self.day = 1
-        self.portfolio = Portfolio()
-        self.bank = Bank()
-        self.prices = {sym: 1.0 for sym in STOCKS}
-        self.price_history = {sym: [1.0] for sym in STOCKS}
-        self.pending_hint = None
-
-        # Build list of symbols once and keep it sorted for readability
-        self.stock_options = sorted(STOCKS.keys())
-
-        self.create_widgets()
-        self.fetch_prices()
-        self.refresh_view()
-
-    # ---------------------------------------------------------------------------
-
-    def create_widgets(self):
-        # Info frame
-        info = tk.Frame(self, bg="#16151a")
-        info.pack(pady=8, fill="x")
-        self.lbl_day = tk.Label(info, text="", font=("Segoe UI Semibold", 20),
-                                fg="#b8c1ec", bg="#16161a")
-        self.lbl_day.grid(row=0, column=0, padx=14)
-        self.lbl_cash = tk.Label(info, text="", font=("Segoe UI", 16),
-                                 fg="#eebbc3", bg="#16161a")
-        self.lbl_cash.grid(row=0, column=1, padx=14)
-        self.lbl_bank = tk.Label(info, text="", font=("Segoe UI", 16),
-                                 fg="#a6e3e9", bg="#16161a")
-        self.lbl_bank.grid(row=0, column=2, padx=14)
-        self.lbl_loan = tk.Label(info, text="", font=("Segoe UI", 16),
-                                 fg="#e76f51", bg="#16161a")
-        self.lbl_loan.grid(row=0, column=3, padx=14)
-        self.lbl_networth = tk.Label(info, text="", font=("Segoe UI Semibold", 16),
-                                     fg="#b8c1ec", bg="#16161a")
-        self.lbl_networth.grid(row=0, column=4, padx=14)
-
-        # Table
-        tbl = tk.Frame(self, bg="#16161a")
-        tbl.pack(pady=8, fill="both", expand=True)
-        cols = ("graphic", "sym", "name", "shares", "avg_paid",
-                "total_paid", "price", "value", "gainloss")
-        self.tree = ttk.Treeview(tbl, columns=cols, show="headings", height=13)
-        for c in cols:
-            self.tree.heading(c, text=c.replace("_", " ").title())
-            width = 52 if c == "graphic" else 125
-            self.tree.column(c, anchor="center", width=width, stretch=False)
-        self.tree.pack(fill="x", padx=10)
-        self.tree.bind("<Double-1>", self.on_stock_double_click)
-
-        # Chart
-        chart = tk.Frame(self, bg="#16161a")
-        chart.pack(pady=(8, 2), fill="x")
-        tk.Label(chart, text="Stock Chart", font=("Segoe UI Semibold", 15),
-                 fg="#eebbc3", bg="#16161a").pack()
-        self.stock_var = tk.StringVar(value="AAPL")
-        self.stock_menu = ttk.Combobox(chart, textvariable=self.stock_var,
-                                      values=self.stock_options, state="readonly",
-                                      width=8, height=12)  # increased height for visibility
-        self.stock_menu.pack(side="left", padx=10)
-        self.stock_menu.bind("<<ComboboxSelected>>", lambda _: self.draw_chart())
-        self.chart_canvas = tk.Canvas(chart, width=600, height=160,
-                                      bg="#232946", highlightthickness=0)
-        self.chart_canvas.pack(side="left", padx=12)
-        self.draw_chart()
-
-        # Controls – only bank actions now
-        ctrl = tk.Frame(self, bg="#16161a")
-        ctrl.pack(pady=10, fill="x")
-
-        # Bank related actions
-        tk.Button(ctrl, text="Deposit", font=("Segoe UI Semibold", 13),
-                  bg="#a6e3e9", fg="#232946",
-                  command=self.bank_deposit, width=10,
-                  relief="flat").pack(side="left", padx=9)
-        tk.Button(ctrl, text="Withdraw", font=("Segoe UI Semibold", 13),
-                  bg="#121629", fg="#eebbc3",
-                  command=self.bank_withdraw, width=10,
-                  relief="flat").pack(side="left", padx=9)
-        tk.Button(ctrl, text="Borrow", font=("Segoe UI Semibold", 13),
-                  bg="#f4a261", fg="#232946",
-                  command=self.bank_borrow, width=10,
-                  relief="flat").pack(side="left", padx=9)
-        tk.Button(ctrl, text="Repay Loan", font=("Segoe UI Semibold", 13),
-                  bg="#b8c1ec", fg="#232946",
-                  command=self.bank_repay, width=11,
-                  relief="flat").pack(side="left", padx=9)
-        tk.Button(ctrl, text="Advance Day", font=("Segoe UI Semibold", 13),
-                  bg="#232946", fg="#eebbc3",
-                  command=self.next_day, width=13,
-                  relief="flat").pack(side="left", padx=12)
-        tk.Button(ctrl, text="❌ Exit", font=("Segoe UI", 13, "bold"),
-                  bg="#e76f51", fg="#22223b",
-                  command=self.quit,
-                  relief="flat", borderwidth=0,
-                  highlightthickness=0, width=10).pack(side="left", padx=9)
-
-        # Log
-        log = tk.Frame(self, bg="#16161a")
-        log.pack(pady=(8, 0), fill="both", expand=False)
-        tk.Label(log, text="Game Log", font=("Segoe UI Semibold", 13),
-                 fg="#eebbc3", bg="#16161a").pack(anchor="w", padx=10)
-        self.log_scroll = tk.Scrollbar(log)
-        self.log_scroll.pack(side="right", fill="y")
-        self.log = tk.Text(log, height=14, width=120,
-                           bg="#232946", fg="#eebbc3",
-                           font=("Consolas", 11), relief="flat",
-                           wrap="word", yscrollcommand=self.log_scroll.set)
-        self.log.pack(fill="x", padx=10)
-        self.log_scroll.config(command=self.log.yview)
-
-    # -------------------------------------------------------------------------
-
-    def fetch_prices(self):
-        for sym in STOCKS:
-            try:
-                tkr = yf.Ticker(sym)
-                hist = tkr.history(period="5d", interval="1d")
-                if not hist.empty:
-                    self.prices[sym] = float(hist["Close"][-1])
-                    self.add_log(f"Initial price for {sym}: ${self.prices[sym]:.2f}")
-            except Exception:
-                pass
-
-    # -------------------------------------------------------------------------
-
-    def random_fluctuations(self):
-        if random.random() < 0.15:
-            event = random.choice(COOL_EVENTS)
-            f_min, f_max = event["factor_range"]
-            self.add_log(f"💥 {event['name']} – {event['desc']}")
-            for sym in event["targets"]:
-                factor = random.uniform(f_min, f_max)
-                old = self.prices.get(sym, 1.0)
-                self.prices[sym] = max(old * factor, old)
-                self.add_log(f"    {STOCK_GRAPHICS.get(sym,'')} {sym}: +{(factor-1)*100:.1f}% (${old:.2f}→${self.prices[sym]:.2f})")
-                self.price_history[sym].append(self.prices[sym])
-        else:
-            for sym in self.prices:
-                factor = random.uniform(1.0001, 1.03)
-                old = self.prices[sym]
-                new = max(old * factor, old)
-                self.prices[sym] = new
-                self.add_log(f"{STOCK_GRAPHICS.get(sym,'')} {sym} daily growth: +{(factor-1)*100:+.1f}% (${old:.2f}→${new:.2f})")
-                self.price_history[sym].append(new)
-
-        if self.pending_hint is None and random.random() < 0.18:
-            friend  = random.choice(FRIENDS_NAMES)
-            hint_sym = random.choice(list(STOCKS.keys()))
-            self.pending_hint = (self.day + 2, hint_sym, friend)
-            self.add_log(f"💬 Your friend {friend} whispers: \"I heard {STOCK_GRAPHICS.get(hint_sym,'')} {hint_sym} will jump in 2 days!\"")
-
-    def apply_hint(self):
-        if self.pending_hint and self.day == self.pending_hint[0]:
-            sym, friend = self.pending_hint[1], self.pending_hint[2]
-            boost = random.uniform(0.25, 0.45)
-            old = self.prices[sym]
-            new = max(old * (1 + boost), old)
-            self.prices[sym] = new
-            self.price_history[sym][-1] = new
-            self.add_log(f"🚀 {friend}'s tip comes true! {STOCK_GRAPHICS.get(sym,'')} {sym} jumps +{boost*100:.1f}% (${old:.2f}→${new:.2f})")
-            self.pending_hint = None
-
-    # -------------------------------------------------------------------------
-
-    def next_day(self):
-        self.day += 1
-        self.add_log(f"\n=== Day {self.day} ===")
-        self.random_fluctuations()
-        self.apply_hint()
-        if self.day % 30 == 0:
-            self.bank.apply_monthly_interest()
-            self.add_log("Bank interest applied.")
-            inter = self.bank.apply_loan_interest()
-            if inter > 0:
-                self.add_log(f"💸 Loan interest applied: ${inter:.2f}")
-        self.refresh_view()
-
-    # -------------------------------------------------------------------------
-
-    def refresh_view(self):
-        self.lbl_day.config(text=f"Day {self.day}")
-        self.lbl_cash.config(text=f"💵 Cash: ${self.portfolio.cash:,.2f}")
-        self.lbl_bank.config(text=f"🏦 Bank: ${self.bank.balance:,.2f}")
-        self.lbl_loan.config(text=f"💳 Loan: ${self.bank.loan:,.2f}")
-        net = self.portfolio.cash + self.bank.balance
-        for sym, shares in self.portfolio.holdings.items():
-            net += shares * self.prices[sym]
-        self.lbl_networth.config(text=f"🌍 Net Worth: ${net:,.2f} / ${TARGET_NET_WORTH:,.2f}")
-
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        for sym in STOCKS:
-            shares   = self.portfolio.holdings[sym]
-            paid     = self.portfolio.total_paid[sym]
-            bought   = self.portfolio.total_bought[sym]
-            avg_paid = paid / bought if bought else 0.0
-            price    = self.prices[sym]
-            value    = shares * price
-            gain     = value - (avg_paid * shares)
-            self.tree.insert("", "end", values=(
-                STOCK_GRAPHICS.get(sym,""),
-                sym,
-                STOCKS[sym],
-                shares,
-                f"${avg_paid:.2f}",
-                f"${paid:.2f}",
-                f"${price:.2f}",
-                f"${value:.2f}",
-                f"${gain:.2f}"
-            ))
-        self.draw_chart()
-
-    def draw_chart(self):
-        sym = self.stock_var.get()
-        prices = self.price_history.get(sym, [1.0])
-        canvas = self.chart_canvas
-        canvas.delete("all")
-        if len(prices) < 2:
-            return
-        mn, mx = min(prices), max(prices)
-        spread = mx - mn or 1
-        h, w = 120, 570
-        pad = 10
-        canvas.create_line(pad, h+pad, w+pad, h+pad, fill="#eebc3", width=2)
-        canvas.create_line(pad, pad, pad, h+pad, fill="#eebc3", width=2)
-        xs, ys = [], []
-        for i, p in enumerate(prices[-40:]):
-            xs.append(pad + i*(w/min(39,len(prices)-1)))
-            ys.append(pad + h - int((p-mn)/spread*h))
-        for i in range(1, len(xs)):
-            canvas.create_line(xs[i-1], ys[i-1], xs[i], ys[i],
-                               fill="#a6e3e9", width=3)
-        for x, y in zip(xs, ys):
-            canvas.create_oval(x-3, y-3, x+3, y+3, fill="#eebc3", outline="#232946")
-        canvas.create_text(w+pad-10, pad+20,
-                           text=f"${prices[-1]:.2f}",
-                           font=("Segoe UI",13), fill="#eebc3")
-        canvas.create_text(pad+20, h+pad+20,
-                           text=f"Min: ${mn:.2f}",
-                           font=("Segoe UI",11), fill="#b8c1ec")
-        canvas.create_text(w+pad-30, h+pad+20,
-                           text=f"Max: ${mx:.2f}",
-                           font=("Segoe UI",11), fill="#b8c1ec")
-        canvas.create_text(w//2, pad+10,
-                           text=f"{STOCK_GRAPHICS.get(sym,'')} {sym}",
-                           font=("Segoe UI Semibold",16), fill="#b8c1ec")
-
-    def add_log(self, msg):
-        self.log.insert("end", msg+"\n")
-        self.log.see("end")
-
-    # -------------------------------------------------------------------------
-
-    def on_stock_double_click(self, event):
-        item = self.tree.focus()
-        if not item:
-            return
-        values = self.tree.item(item, "values")
-        sym = values[1]
-        price = self.prices[sym]
-        action = simpledialog.askstring("Buy / Sell",
-                                        "Enter 'B' to buy, 'S' to sell:",
-                                        initialvalue="B", parent=self)
-        if not action:
-            return
-        action = action.upper()
-        if action not in ("B", "S"):
-            messagebox.showerror("Error", "Invalid choice (must be B or S).", parent=self)
-            return
-        try:
-            shares = int(simpledialog.askstring("Shares", "How many shares?", parent=self))
-        except Exception:
-            messagebox.showerror("Error", "Invalid number of shares.", parent=self)
-            return
-        if shares <= 0:
-            messagebox.showerror("Error", "Shares must be positive.", parent=self)
-            return
-
-        if action == "B":
-            ok, msg = self.portfolio.buy(sym, shares, price)
-        else:
-            ok, msg = self.portfolio.sell(sym, shares, price)
-
-        if ok:
-            self.add_log(msg)
-        else:
-            messagebox.showerror("Error", msg, parent=self)
-        self.refresh_view()
-
-    # -------------------------------------------------------------------------
-
-    def bank_deposit(self):
-        try:
-            amt = float(simpledialog.askstring("Deposit", "Amount?", initialvalue="100", parent=self))
-        except Exception:
-            messagebox.showerror("Error", "Invalid amount.", parent=self)
-            return
-        ok, msg = self.bank.deposit(amt, self.portfolio.cash)
-        if ok:
-            self.portfolio.cash -= amt
-            self.add_log(msg)
-        else:
-            messagebox.showerror("Error", msg, parent=self)
-        self.refresh_view()
-
-    def bank_withdraw(self):
-        try:
-            amt = float(simpledialog.askstring("Withdraw", "Amount?", initialvalue="100", parent=self))
-        except Exception:
-            messagebox.showerror("Error", "Invalid amount.", parent=self)
-            return
-        ok, msg = self.bank.withdraw(amt)
-        if ok:
-            self.portfolio.cash += amt
-            self.add_log(msg)
-        else:
-            messagebox.showerror("Error", msg, parent=self)
-        self.refresh_view()
-
-    def bank_borrow(self):
-        try:
-            amt = float(simpledialog.askstring("Borrow", "Amount to borrow (max $100,000)?",
-                                               initialvalue="1000", parent=self))
-        except Exception:
-            messagebox.showerror("Error", "Invalid amount.", parent=self)
-            return
-        ok, msg = self.bank.borrow(amt)
-        if ok:
-            self.portfolio.cash += amt
-            self.add_log(msg)
-        else:
-            messagebox.showerror("Error", msg, parent=self)
-        self.refresh_view()
-
-    def bank_repay(self):
-        try:
-            amt = float(simpledialog.askstring("Repay Loan", "Amount to repay?",
-                                               initialvalue="1000", parent=self))
-        except Exception:
-            messagebox.showerror("Error", "Invalid amount.", parent=self)
-            return
-        ok, msg = self.bank.repay(amt, self.portfolio.cash)
-        if ok:
-            self.portfolio.cash -= min(amt, self.bank.loan + amt)
-            self.add_log(msg)
-        else:
-            messagebox.showerror("Error", msg, parent=self)
-        self.refresh_view()
-
-# --------------------- run -----------------------------------------------------------
-
-if __name__ == "__main__":
-    StockTreasureGame().mainloop()
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+STARTUP_MARKS = [("interpreter ready", time.perf_counter())]   # see --profile-startup
+
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+import argparse
+import array
+import bisect
+import csv
+import cProfile
+import datetime
+import functools
+import heapq
+import importlib
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import queue
+import random
+import sqlite3
+import struct
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+STARTUP_MARKS.append(("stdlib and tkinter imports", time.perf_counter()))
+import numpy as np
+STARTUP_MARKS.append(("numpy import", time.perf_counter()))
+# yfinance (and pandas with it) is imported lazily by yfinance_quote, on a
+# loader thread, and only when a network refresh is actually needed.
+
+# ---------------------------------- constants --------------------------------
+
+STARTING_CASH = 25000.0
+TARGET_NET_WORTH = 5000000.0
+ANNUAL_BANK_RATE = 0.05
+LOAN_INTEREST     = 0.05
+MAX_LOAN          = 100000.0
+COST_BASIS_METHODS = ("average", "fifo")
+LEDGER_PATH       = os.path.join(os.path.expanduser("~"), ".stock_treasure", "ledger.npz")
+
+FETCH_WORKERS     = 32      # enough to fetch the whole universe in one round-trip
+FETCH_TIMEOUT     = 10.0    # seconds allowed per symbol
+FETCH_POLL_MS     = 50      # how often the UI drains loader results
+LIVE_POLL_MS      = 250     # how often the UI drains live refresh batches
+LIVE_BACKOFF_MAX  = 600.0   # longest wait before retrying a symbol whose quotes keep failing
+
+CACHE_PATH        = os.path.join(os.path.expanduser("~"), ".stock_treasure", "prices.sqlite3")
+CACHE_TTL         = 6 * 3600.0  # seconds before a cached quote is fetched again
+CACHE_KEEP_DAYS   = 30          # quotes dated older than this are evicted
+
+SAVE_PATH         = os.path.join(os.path.expanduser("~"), ".stock_treasure", "save.stk")
+SAVE_MAGIC        = b"STKSAVE\0"
+SAVE_VERSION      = 2
+SAVE_HEADER       = struct.Struct("<8sIIqqqqddddI")  # see save_game for the field order
+SAVE_ALIGN        = 64          # the history block starts on this boundary
+REPLAY_MAGIC      = b"STKRPLY\0"
+REPLAY_VERSION    = 1
+REPLAY_HEADER     = struct.Struct("<8sIIqqqq")      # see build_replay for the field order
+REPLAY_SUFFIX     = ".replay"
+REPLAY_CHUNK_DAYS = 256         # trading days read from a replay file at a time
+
+PROFILE_SAMPLES   = 1000        # latencies kept per handler for the percentiles
+PROFILE_DIR       = os.path.join(os.path.expanduser("~"), ".stock_treasure")
+OVERLAY_MS        = 500         # refresh period of the timing overlay
+
+LOG_DETAIL        = logging.DEBUG   # per-symbol lines (daily growth, loaded prices)
+LOG_INFO          = logging.INFO    # everything else
+LOG_LEVELS        = {"detail": LOG_DETAIL, "info": LOG_INFO}
+LOG_MAX_LINES     = 2000            # lines kept in the on-screen log
+LOG_PATH          = os.path.join(os.path.expanduser("~"), ".stock_treasure", "game.log")
+LOG_FILE_BYTES    = 1_000_000
+LOG_FILE_BACKUPS  = 3
+
+STOCKS = {
+    "AAPL": "Apple Inc.", "MSFT": "Microsoft Corp.", "GOOG": "Alphabet Inc.",
+    "AMZN": "Amazon.com Inc.", "TSLA": "Tesla Inc.", "JPM":  "JP Morgan Chase & Co.",
+    "XOM":  "Exxon Mobil Corp.", "NVDA": "NVIDIA Corp.", "V":    "Visa Inc.",
+    "NFLX": "Netflix Inc.", "DIS":  "The Walt Disney Company", "BAC":  "Bank of America Corp.",
+    "INTC": "Intel Corp.", "KO":   "Coca‑Cola Co.", "PEP":  "PepsiCo Inc.", "SBUX": "Starbucks Corp.",
+    "MCD":  "McDonald’s Corp.", "BA":   "Boeing Co.", "CSCO": "Cisco Systems Inc.", "ADBE": "Adobe Inc.",
+    "PYPL": "PayPal Holdings Inc.", "CRM":  "Salesforce Inc.", "ORCL": "Oracle Corp.",
+    "T":    "AT&T Inc.", "GE":   "General Electric Co.", "HON":  "Honeywell International",
+    "WMT":  "Walmart Inc.", "CVX":  "Chevron Corp.", "F":    "Ford Motor Co.", "GM":   "General Motors Co.",
+}
+
+STOCK_GRAPHICS = {
+    "AAPL": "🍏", "MSFT": "🪟", "GOOG": "🔍", "AMZN": "🛒", "TSLA": "🚗",
+    "JPM":  "🏦", "XOM":  "🛢️", "NVDA": "💻", "V":    "💳", "NFLX": "📺",
+    "DIS":  "🏰", "BAC":  "🏦", "INTC": "🔌", "KO":   "🥤", "PEP":  "🥤",
+    "SBUX": "☕",  "MCD":  "🍔", "BA":   "✈️",  "CSCO": "📡", "ADBE": "🖌️",
+    "PYPL": "💸",  "CRM":  "☁️", "ORCL": "🗃️", "T":    "📞", "GE":   "⚙️",
+    "HON":  "🏭",  "WMT":  "🏬", "CVX":  "⛽",  "F":    "🚙", "GM":   "🚙",
+}
+
+# -------------------------------- events (always positive) -----------------------
+
+COOL_EVENTS = [
+    {"name": "AI Breakthrough!", "desc": "AI beats all benchmarks, tech stocks skyrocket!",
+     "targets": ["AAPL", "MSFT", "GOOG", "NVDA", "ADBE", "CRM", "ORCL"], "factor_range": (1.1, 2.0)},
+    {"name": "Technology Surge", "desc": "Broad tech rally boosts all tech names for three days.",
+     "targets": "all", "factor_range": (1.05, 1.15), "days": 3},
+    {"name": "Bullish Momentum", "desc": "Strong market momentum pushes all values up.",
+     "targets": "all", "factor_range": (1.02, 1.07)},
+]
+
+EVENT_CHANCE      = 0.15           # chance per day of a COOL_EVENTS shock
+GROWTH_RANGE      = (1.0001, 1.03) # daily growth factor on quiet days
+HINT_CHANCE       = 0.18           # chance per day of a friend's tip
+HINT_DELAY        = 2              # days until a tip comes true; this many can be pending
+HINT_BOOST_RANGE  = (0.25, 0.45)
+INTEREST_PERIOD   = 30             # days between bank and loan interest
+DIVIDEND_PERIOD   = 90             # days between dividend payouts on held shares
+DIVIDEND_YIELD    = 0.02           # annual, paid out a quarter at a time
+FF_FRAME_BUDGET   = 0.03           # seconds of simulation per fast-forward chunk
+HISTORY_MAX_DAYS  = 20000          # oldest half of the price history is dropped past this
+HISTORY_MAX_BYTES = 128 * 2**20    # ...or past this many bytes, for large universes
+CHART_POINTS      = 40             # days shown on the stock chart
+CHART_ZOOM_POINTS = 300            # full-history chart is downsampled to this many points
+CHART_HEADROOM    = 0.25           # spread kept free above the max before the y axis rescales
+
+FRIENDS_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Avery", "Riley", "Sam"]
+
+# -------------------------------- models -----------------------------------------
+
+class TradeLedger:
+    """Append-only record of every trade with per-symbol lots.
+
+    Trades are stored column-wise in growable arrays. Each symbol has a
+    deque of open lots ([shares, price, day]) consumed oldest first, and the
+    position, cost basis, realized P&L and trade count per symbol are kept
+    as running vectors, so position queries never walk the trade history.
+    ``method`` picks how a sale's cost is measured: "average" spreads the
+    basis evenly over the shares held, "fifo" uses the oldest lots.
+    """
+
+    def __init__(self, symbols, method="average"):
+        if method not in COST_BASIS_METHODS:
+            raise ValueError(f"unknown cost basis method {method!r}")
+        self.symbols = list(symbols)
+        self.method = method
+        n = len(self.symbols)
+        self.day      = array.array("q")
+        self.sym      = array.array("q")
+        self.shares   = array.array("q")   # negative for sales
+        self.price    = array.array("d")
+        self.pnl      = array.array("d")   # realized on that trade
+        self.lots     = [deque() for _ in range(n)]
+        self.position = np.zeros(n, dtype=np.int64)
+        self.basis    = np.zeros(n)
+        self.realized = np.zeros(n)
+        self.trades   = np.zeros(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.day)
+
+    def record(self, i, shares, price, day):
+        # ``shares`` is signed: positive buys, negative sells; returns realized P&L
+        pnl = 0.0
+        if shares > 0:
+            self.lots[i].append([shares, price, day])
+            self.basis[i] += shares * price
+        else:
+            sold = -shares
+            lot_cost = self._consume(i, sold)
+            cost = lot_cost if self.method == "fifo" else self.basis[i] * sold / self.position[i]
+            pnl = sold * price - cost
+            self.basis[i] = self.basis[i] - cost if self.position[i] != sold else 0.0
+            self.realized[i] += pnl
+        self.position[i] += shares
+        self.trades[i] += 1
+        self.day.append(day)
+        self.sym.append(i)
+        self.shares.append(shares)
+        self.price.append(price)
+        self.pnl.append(pnl)
+        return pnl
+
+    def record_many(self, idx, shares, prices, day):
+        # Vector form of record() for an order naming each symbol at most once;
+        # only the lot queues are touched per symbol
+        pnl = np.zeros(idx.size)
+        buys = shares > 0
+        for i, n, price in zip(idx[buys].tolist(), shares[buys].tolist(), prices[buys].tolist()):
+            self.lots[i].append([n, price, day])
+        self.basis[idx[buys]] += shares[buys] * prices[buys]
+        sells = ~buys
+        if sells.any():
+            si, sold = idx[sells], -shares[sells]
+            lot_cost = np.array([self._consume(i, n) for i, n in zip(si.tolist(), sold.tolist())])
+            held = self.position[si]
+            cost = lot_cost if self.method == "fifo" else self.basis[si] * sold / held
+            pnl[sells] = sold * prices[sells] - cost
+            self.basis[si] = np.where(held == sold, 0.0, self.basis[si] - cost)
+            self.realized[si] += pnl[sells]
+        self.position[idx] += shares
+        self.trades[idx] += 1
+        self.day.frombytes(np.full(idx.size, day, dtype=np.int64).tobytes())
+        self.sym.frombytes(idx.astype(np.int64).tobytes())
+        self.shares.frombytes(shares.astype(np.int64).tobytes())
+        self.price.frombytes(prices.astype(np.float64).tobytes())
+        self.pnl.frombytes(pnl.tobytes())
+        return pnl
+
+    def _consume(self, i, sold):
+        # Take ``sold`` shares from the oldest lots; amortized O(1) per trade
+        lots, cost = self.lots[i], 0.0
+        while sold:
+            lot = lots[0]
+            take = min(sold, lot[0])
+            cost += take * lot[1]
+            lot[0] -= take
+            sold -= take
+            if not lot[0]:
+                lots.popleft()
+        return cost
+
+    def avg_cost(self):
+        return np.divide(self.basis, self.position,
+                         out=np.zeros(len(self.symbols)), where=self.position > 0)
+
+    def unrealized(self, prices):
+        return self.position * prices - self.basis
+
+    def open_lots(self, sym, price):
+        # (day, shares, cost, return) for every lot still held. Under average
+        # cost every share carries the running average, so the lots only say
+        # when the shares were bought and the costs always add up to ``basis``
+        i = self.symbols.index(sym)
+        if self.method == "fifo":
+            return [(day, shares, cost, price / cost - 1.0) for shares, cost, day in self.lots[i]]
+        avg = self.basis[i] / self.position[i] if self.position[i] else 0.0
+        return [(day, shares, avg, price / avg - 1.0) for shares, _, day in self.lots[i]]
+
+    def columns(self):
+        return {
+            "day": np.frombuffer(self.day, dtype=np.int64),
+            "symbol": np.array(self.symbols)[np.frombuffer(self.sym, dtype=np.int64)],
+            "shares": np.frombuffer(self.shares, dtype=np.int64),
+            "price": np.frombuffer(self.price, dtype=np.float64),
+            "realized": np.frombuffer(self.pnl, dtype=np.float64),
+        }
+
+    def export(self, path):
+        # Parquet when pyarrow is installed and asked for, NumPy .npz otherwise
+        cols = self.columns()
+        if path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table(cols), path)
+        else:
+            np.savez_compressed(path, **cols)
+        return len(self)
+
+class Portfolio:
+    """Cash plus per-symbol positions backed by a TradeLedger.
+
+    ``holdings`` and ``total_paid`` are the ledger's NumPy vectors, indexed
+    through ``index`` (symbol -> position), so valuations are single vector
+    expressions instead of per-symbol dict lookups.
+    """
+
+    __slots__ = ("symbols", "index", "cash", "ledger", "dirty")
+
+    def __init__(self, cash=STARTING_CASH, symbols=STOCKS, cost_basis="average"):
+        self.symbols = list(symbols)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.cash = cash
+        self.ledger = TradeLedger(self.symbols, cost_basis)
+        self.dirty = set()   # symbols whose position changed since the view last looked
+
+    @property
+    def holdings(self):
+        return self.ledger.position
+
+    @property
+    def total_paid(self):
+        return self.ledger.basis
+
+    def shares(self, sym):
+        return int(self.holdings[self.index[sym]])
+
+    def buy(self, sym, shares, price, day=0):
+        if shares <= 0 or shares * price > self.cash:
+            return False, "Invalid share count or insufficient cash."
+        self.cash -= shares * price
+        self.ledger.record(self.index[sym], shares, price, day)
+        self.dirty.add(sym)
+        return True, f"Bought {shares} shares of {sym} at ${price:.2f} each (${shares * price:.2f} total)."
+
+    def sell(self, sym, shares, price, day=0):
+        i = self.index[sym]
+        if shares <= 0 or shares > self.holdings[i]:
+            return False, "Invalid share count."
+        proceeds = shares * price
+        self.cash += proceeds
+        pnl = self.ledger.record(i, -shares, price, day)
+        self.dirty.add(sym)
+        return True, (f"Sold {shares} shares of {sym} at ${price:.2f} each "
+                      f"(${proceeds:.2f} total, realized ${pnl:+.2f}).")
+
+    def _order(self, syms, shares, prices):
+        idx = np.asarray([self.index[s] for s in syms] if len(syms) and isinstance(syms[0], str)
+                         else syms, dtype=np.intp)
+        shares = np.asarray(shares, dtype=np.int64)
+        prices = np.asarray(prices, dtype=float)
+        if len(np.unique(idx)) != len(idx):
+            raise ValueError("each symbol may appear only once in a bulk order")
+        return idx, shares, prices
+
+    def buy_many(self, syms, shares, prices, day=0):
+        # All-or-nothing: either every line of the order fills or none does
+        idx, shares, prices = self._order(syms, shares, prices)
+        cost = shares * prices
+        total = cost.sum()
+        if not idx.size or (shares <= 0).any() or total > self.cash:
+            return False, "Invalid share count or insufficient cash."
+        self.cash -= total
+        self.ledger.record_many(idx, shares, prices, day)
+        self.dirty.update(self.symbols[i] for i in idx)
+        return True, f"Bought {shares.sum()} shares across {idx.size} stocks (${total:.2f} total)."
+
+    def sell_many(self, syms, shares, prices, day=0):
+        idx, shares, prices = self._order(syms, shares, prices)
+        if not idx.size or (shares <= 0).any() or (shares > self.holdings[idx]).any():
+            return False, "Invalid share count."
+        proceeds = (shares * prices).sum()
+        self.cash += proceeds
+        pnl = self.ledger.record_many(idx, -shares, prices, day).sum()
+        self.dirty.update(self.symbols[i] for i in idx)
+        return True, (f"Sold {shares.sum()} shares across {idx.size} stocks "
+                      f"(${proceeds:.2f} total, realized ${pnl:+.2f}).")
+
+    # Valuations; ``prices`` is a vector aligned with ``symbols``
+
+    def market_values(self, prices):
+        return self.holdings * prices
+
+    def value(self, prices):
+        return self.cash + float(self.holdings @ prices)
+
+    def avg_cost(self):
+        return self.ledger.avg_cost()
+
+    def unrealized(self, prices):
+        return self.ledger.unrealized(prices)
+
+class Bank:
+    def __init__(self, annual_rate=ANNUAL_BANK_RATE):
+        self.balance = 0.0
+        self.annual_rate = annual_rate
+        self.loan = 0.0
+
+    def deposit(self, amt, avail_cash):
+        if amt <= 0 or amt > avail_cash:
+            return False, "Invalid deposit amount."
+        self.balance += amt
+        return True, f"Deposited ${amt:.2f}."
+
+    def withdraw(self, amt):
+        if amt <= 0 or amt > self.balance:
+            return False, "Invalid withdraw amount."
+        self.balance -= amt
+        return True, f"Withdrew ${amt:.2f}."
+
+    def apply_monthly_interest(self):
+        self.balance *= 1 + self.annual_rate / 12.0
+
+    def borrow(self, amt):
+        if amt <= 0 or self.loan + amt > MAX_LOAN:
+            return False, "Invalid or excessive loan."
+        self.loan += amt
+        return True, f"Borrowed ${amt:.2f}."
+
+    def repay(self, amt, avail_cash):
+        if amt <= 0 or amt > avail_cash:
+            return False, "Invalid or insufficient cash."
+        amt = min(amt, self.loan)
+        self.loan -= amt
+        return True, f"Repaid ${amt:.2f}. Remaining loan: ${self.loan:.2f}"
+
+    def apply_loan_interest(self):
+        if self.loan > 0:
+            inter = self.loan * LOAN_INTEREST
+            self.loan += inter
+            return inter
+        return 0.0
+
+# -------------------------------- price history ----------------------------------
+
+def history_limit(max_days, n_symbols):
+    if not max_days:
+        return max_days
+    return max(2, min(max_days, HISTORY_MAX_BYTES // (8 * max(1, n_symbols))))
+
+class PriceHistory:
+    """Days x symbols float64 matrix with amortized O(1) appends.
+
+    Rows are preallocated and the buffer doubles when full. Once more than
+    ``max_days`` rows are held the oldest half is dropped, so memory stays
+    bounded in long sessions. Per-symbol min/max over the retained rows are
+    kept up to date on every append so charts never rescan the history.
+    """
+
+    def __init__(self, symbols, initial, capacity=256, max_days=HISTORY_MAX_DAYS):
+        self.symbols = list(symbols)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.max_days = history_limit(max_days, len(self.symbols))
+        self.data = np.empty((max(2, capacity), len(self.symbols)))
+        self.data[0] = initial
+        self.length = 1
+        self.first_day = 1         # game day of row 0
+        self.mins = self.data[0].copy()
+        self.maxs = self.data[0].copy()
+
+    def __len__(self):
+        return self.length
+
+    def append(self, row):
+        if self.length == len(self.data):
+            self._make_room()
+        self.data[self.length] = row
+        self.length += 1
+        np.minimum(self.mins, row, out=self.mins)
+        np.maximum(self.maxs, row, out=self.maxs)
+
+    def set_last(self, i, value):
+        col = self.data[:self.length, i]
+        old, col[-1] = col[-1], value
+        # Only an extreme moving inward can expose another row as the new one
+        if (old >= self.maxs[i] and value < old) or (old <= self.mins[i] and value > old):
+            self.mins[i], self.maxs[i] = col.min(), col.max()
+        else:
+            self.mins[i] = min(self.mins[i], value)
+            self.maxs[i] = max(self.maxs[i], value)
+
+    def release(self):
+        # A history loaded from a save is a copy-on-write map of that file;
+        # copy it into memory so the file can be replaced (Windows refuses
+        # to replace a mapped file).
+        if isinstance(self.data, np.memmap):
+            self.data = np.array(self.data)
+
+    def _make_room(self):
+        if self.max_days and self.length >= self.max_days:
+            self.release()
+            drop = self.length // 2
+            keep = self.length - drop
+            self.data[:keep] = self.data[drop:self.length]
+            self.length = keep
+            self.first_day += drop
+            self.mins = self.data[:keep].min(axis=0)
+            self.maxs = self.data[:keep].max(axis=0)
+        else:
+            rows = len(self.data) * 2
+            if self.max_days:
+                rows = min(rows, self.max_days)
+            grown = np.empty((rows, self.data.shape[1]))
+            grown[:self.length] = self.data[:self.length]
+            self.data = grown
+
+    def rows(self):
+        return self.data[:self.length]
+
+    def series(self, sym):
+        # Strided view into the matrix; no copy is made
+        return self.data[:self.length, self.index[sym]]
+
+    def window(self, sym, n):
+        return self.data[max(0, self.length - n):self.length, self.index[sym]]
+
+    def minmax(self, sym):
+        i = self.index[sym]
+        return float(self.mins[i]), float(self.maxs[i])
+
+    @classmethod
+    def from_buffer(cls, symbols, data, first_day, mins, maxs, max_days=HISTORY_MAX_DAYS):
+        # Wrap an existing (e.g. memory-mapped) block without copying it; the
+        # buffer is only copied when the first append needs more room.
+        hist = cls.__new__(cls)
+        hist.symbols = list(symbols)
+        hist.index = {sym: i for i, sym in enumerate(hist.symbols)}
+        hist.max_days = history_limit(max_days, len(hist.symbols))
+        hist.data = data
+        hist.length = len(data)
+        hist.first_day = first_day
+        hist.mins = np.array(mins, dtype=float)
+        hist.maxs = np.array(maxs, dtype=float)
+        return hist
+
+# -------------------------------- scheduler --------------------------------------
+
+class EventScheduler:
+    """Min-heap of (due_day, seq, kind, data, symbol index) entries.
+
+    Entries come out in day order, and in scheduling order within a day, so
+    a day costs O(entries due) however many are waiting. ``by_symbol``
+    counts each stock's pending entries so rules like "one tip per stock"
+    never scan the heap. ``data`` must be JSON-serializable for save files.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.seq = 0
+        self.by_symbol = {}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, day, kind, data=None, sym=None):
+        heapq.heappush(self.heap, (day, self.seq, kind, data, sym))
+        self.seq += 1
+        if sym is not None:
+            self.by_symbol[sym] = self.by_symbol.get(sym, 0) + 1
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, day):
+        due = []
+        while self.heap and self.heap[0][0] <= day:
+            entry = heapq.heappop(self.heap)
+            if entry[4] is not None:
+                self.by_symbol[entry[4]] -= 1
+            due.append(entry)
+        return due
+
+    def pending_for(self, sym):
+        return self.by_symbol.get(sym, 0)
+
+    def entries(self):
+        return [[day, kind, data, sym] for day, _, kind, data, sym in sorted(self.heap)]
+
+    @classmethod
+    def from_entries(cls, entries):
+        sched = cls()
+        for day, kind, data, sym in entries:
+            sched.schedule(day, kind, data, sym)
+        return sched
+
+# -------------------------------- market engine ----------------------------------
+
+class DayResult:
+    """What happened during one MarketEngine.step, for views to report."""
+
+    __slots__ = ("day", "old_prices", "event", "changed", "factors", "ongoing",
+                 "new_hint", "hint_hit", "interest", "loan_interest", "dividends",
+                 "date", "replay_end")
+
+    def __init__(self, day, old_prices):
+        self.day = day
+        self.old_prices = old_prices
+        self.event = None          # COOL_EVENTS entry on shock days
+        self.changed = None        # indices moved by growth or the event
+        self.factors = None        # growth factor per index in ``changed``
+        self.ongoing = []          # (event, day n, of days) for multi-day events still running
+        self.new_hint = None       # (due_day, sym, friend) whispered today
+        self.hint_hit = None       # (sym, friend, boost, old, new) fulfilled today
+        self.interest = False
+        self.loan_interest = 0.0
+        self.dividends = 0.0       # cash paid out on held shares today
+        self.date = None           # trading date when replaying history
+        self.replay_end = False    # the replay has no more days; prices stood still
+
+class MarketEngine:
+    """Headless market simulation over a NumPy price vector.
+
+    Prices are indexed by position in ``symbols``; all randomness comes from
+    a seedable numpy Generator so runs are reproducible. Everything that
+    happens on a later day (tips, the rest of a multi-day event, interest,
+    dividends) goes through ``scheduler``. With a ReplayFeed attached the
+    prices follow the recorded closes instead, and there are no events, tips
+    or dividends.
+    """
+
+    def __init__(self, symbols, prices=None, bank=None, seed=None, portfolio=None):
+        self.symbols = list(symbols)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.prices = np.ones(len(self.symbols))
+        if prices is not None:
+            for sym, price in prices.items():
+                self.prices[self.index[sym]] = price
+        self.bank = bank
+        self.portfolio = portfolio   # credited with dividends when set
+        self.day = 1
+        self.rng = np.random.default_rng(seed)
+        self.all_idx = np.arange(len(self.symbols))
+        self.history = PriceHistory(self.symbols, self.prices)
+        self.dirty = np.ones(len(self.symbols), dtype=bool)   # prices changed since last view
+        self.feed = None
+        self.replay_over = False
+        # Event targets resolved to index arrays once instead of on every shock;
+        # events none of whose stocks are in this universe are left out
+        self.events = []
+        for event in COOL_EVENTS:
+            idx = self.all_idx if event["targets"] == "all" else np.array(
+                [self.index[sym] for sym in event["targets"] if sym in self.index], dtype=np.intp)
+            if idx.size:
+                self.events.append((event, idx))
+        self.handlers = {"hint": self._fire_hint, "event": self._continue_event,
+                         "interest": self._pay_interest, "loan_interest": self._charge_loan,
+                         "dividend": self._pay_dividends}
+        self.reset_schedule()
+
+    def reset_schedule(self):
+        # Recurring entries fall on multiples of their period, as they always have
+        self.scheduler = EventScheduler()
+        kinds = [("interest", INTEREST_PERIOD), ("loan_interest", INTEREST_PERIOD)]
+        if self.feed is None:
+            kinds.append(("dividend", DIVIDEND_PERIOD))
+        for kind, period in kinds:
+            self.scheduler.schedule((self.day // period + 1) * period, kind, period)
+
+    def next_due(self):
+        return self.scheduler.next_due()
+
+    def price(self, sym):
+        return float(self.prices[self.index[sym]])
+
+    def set_price(self, sym, price):
+        self.prices[self.index[sym]] = price
+        self.dirty[self.index[sym]] = True
+
+    def attach_replay(self, feed):
+        # The feed's symbols must be ours, in our order; the game restarts
+        # from its current day.
+        if feed.symbols != self.symbols:
+            raise ValueError("replay feed was opened for a different stock universe")
+        self.feed = feed
+        self.replay_over = False
+        self.reset_schedule()
+        self.prices[:] = feed.prices
+        self.history = PriceHistory(self.symbols, self.prices)
+        self.dirty[:] = True
+
+    def step(self):
+        rng = self.rng
+        self.day += 1
+        res = DayResult(self.day, self.prices.copy())
+
+        if self.feed is not None:
+            self._replay_day(res)
+        else:
+            if self.events and rng.random() < EVENT_CHANCE:
+                n = rng.integers(len(self.events))
+                res.event, idx = self.events[n]
+                factors = rng.uniform(*res.event["factor_range"], size=idx.size)
+                days = res.event.get("days", 1)
+                if days > 1:
+                    # The drawn move is spread evenly over the event's days
+                    factors **= 1.0 / days
+                    self.scheduler.schedule(self.day + 1, "event", [int(n), 2, factors.tolist()])
+            else:
+                idx = self.all_idx
+                factors = rng.uniform(*GROWTH_RANGE, size=idx.size)
+            old = self.prices[idx]
+            self.prices[idx] = np.maximum(old * factors, old)
+            res.changed, res.factors = idx, factors
+            self.dirty[idx] = True
+
+            # At most one new tip a day, so up to HINT_DELAY are pending at once
+            if rng.random() < HINT_CHANCE:
+                friend = FRIENDS_NAMES[rng.integers(len(FRIENDS_NAMES))]
+                i = int(rng.integers(len(self.symbols)))
+                if not self.scheduler.pending_for(i):
+                    sym = self.symbols[i]
+                    self.scheduler.schedule(self.day + HINT_DELAY, "hint", [sym, friend], i)
+                    res.new_hint = (self.day + HINT_DELAY, sym, friend)
+
+        for _, _, kind, data, i in self.scheduler.pop_due(self.day):
+            self.handlers[kind](res, data, i)
+        self.history.append(self.prices)
+        return res
+
+    def _fire_hint(self, res, data, i):
+        sym, friend = data
+        boost = self.rng.uniform(*HINT_BOOST_RANGE)
+        old = self.prices[i]
+        self.prices[i] = max(old * (1 + boost), old)
+        res.hint_hit = (sym, friend, boost, old, self.prices[i])
+        self.dirty[i] = True
+
+    def _continue_event(self, res, data, _):
+        n, day, factors = data
+        event, idx = self.events[n]
+        old = self.prices[idx]
+        self.prices[idx] = np.maximum(old * np.asarray(factors), old)
+        self.dirty[idx] = True
+        res.ongoing.append((event, day, event["days"]))
+        if day < event["days"]:
+            self.scheduler.schedule(self.day + 1, "event", [n, day + 1, factors])
+
+    def _pay_interest(self, res, period, _):
+        if self.bank is not None:
+            self.bank.apply_monthly_interest()
+            res.interest = True
+        self.scheduler.schedule(self.day + period, "interest", period)
+
+    def _charge_loan(self, res, period, _):
+        if self.bank is not None:
+            res.loan_interest = self.bank.apply_loan_interest()
+        self.scheduler.schedule(self.day + period, "loan_interest", period)
+
+    def _pay_dividends(self, res, period, _):
+        if self.portfolio is not None:
+            res.dividends = float(self.portfolio.holdings @ self.prices) * DIVIDEND_YIELD * period / 360
+            self.portfolio.cash += res.dividends
+        self.scheduler.schedule(self.day + period, "dividend", period)
+
+    def _replay_day(self, res):
+        row = self.feed.next_row()
+        if row is None:
+            # Reported once; after that the market simply stands still
+            res.replay_end = not self.replay_over
+            self.replay_over = True
+            res.changed, res.factors = np.empty(0, dtype=np.intp), np.empty(0)
+        else:
+            idx = np.flatnonzero(row != self.prices)
+            res.changed, res.factors = idx, row[idx] / self.prices[idx]
+            self.prices[idx] = row[idx]
+            self.dirty[idx] = True
+        res.date = self.feed.date
+
+    def skip_idle(self, limit):
+        # Once a replay has run out nothing moves until the next scheduled
+        # entry, so those days only need their (flat) history rows.
+        if not self.replay_over:
+            return 0
+        due = self.scheduler.next_due()
+        n = limit if due is None else min(limit, due - self.day - 1)
+        for _ in range(max(0, n)):
+            self.history.append(self.prices)
+        self.day += max(0, n)
+        return max(0, n)
+
+    def advance(self, days, stop=None, deadline=None):
+        # Step up to ``days`` days, stopping after the first day for which
+        # stop(res) is true or once time.perf_counter() passes ``deadline``.
+        # Returns (days stepped, last DayResult, whether stop fired).
+        res = None
+        n = 0
+        while n < days:
+            # The last day is always stepped so there is a DayResult to return
+            n += self.skip_idle(days - n - 1) + 1
+            res = self.step()
+            if res.replay_end or (stop is not None and stop(res)):
+                return n, res, True
+            if deadline is not None and time.perf_counter() > deadline:
+                return n, res, False
+        return days, res, False
+
+# -------------------------------- historical replay ------------------------------
+
+def _day_ordinal(value):
+    # "2024-01-02", "2024-01-02 00:00:00-05:00", date or Timestamp alike
+    return datetime.date.fromisoformat(str(value)[:10]).toordinal()
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _file_symbol(path):
+    # A one-stock OHLCV export (``yf.Ticker(sym).history().to_csv()``) names
+    # its columns after fields, not symbols; the file name is the ticker.
+    # Its Close column is what tells it apart from a wide file: LOW and OPEN
+    # are real tickers, CLOSE is not.
+    return os.path.splitext(os.path.basename(path))[0].upper()
+
+def _csv_rows(path):
+    """Yield (date ordinal, {symbol: close}) from a price CSV, in file order.
+
+    Understands the long layout (Date, Symbol/Ticker, ..., Close), a wide
+    layout of closes (Date, AAPL, MSFT, ...), the three header rows written
+    by ``yf.download(...).to_csv()`` (Price / Ticker / Date), and a single
+    stock's OHLCV history named after its ticker (AAPL.csv).
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        low = [h.lower() for h in header]
+        if low[0] == "price":
+            tickers = next(reader)
+            next(reader)                       # the "Date,,,," row
+            cols = [(j, tickers[j].strip().upper()) for j, h in enumerate(low)
+                    if h == "close" and j < len(tickers)]
+            for row in reader:
+                if row:
+                    yield _day_ordinal(row[0]), {sym: _float(row[j]) for j, sym in cols}
+        elif "symbol" in low or "ticker" in low:
+            d, s = low.index("date"), low.index("symbol" if "symbol" in low else "ticker")
+            c = low.index("close")
+            for row in reader:
+                if row:
+                    yield _day_ordinal(row[d]), {row[s].strip().upper(): _float(row[c])}
+        elif "close" in low:
+            sym, c = _file_symbol(path), low.index("close")
+            for row in reader:
+                if row:
+                    yield _day_ordinal(row[0]), {sym: _float(row[c])}
+        else:
+            cols = [(j, h.upper()) for j, h in enumerate(header) if j]
+            for row in reader:
+                if row:
+                    yield _day_ordinal(row[0]), {sym: _float(row[j]) for j, sym in cols}
+
+def _parquet_rows(path):
+    # Same layouts as _csv_rows (except the multi-row header), read batch by batch
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    names = pf.schema_arrow.names
+    low = [n.lower() for n in names]
+    for batch in pf.iter_batches():
+        cols = batch.to_pydict()
+        dates = cols[names[low.index("date")]]
+        if "symbol" in low or "ticker" in low:
+            syms = cols[names[low.index("symbol" if "symbol" in low else "ticker")]]
+            closes = cols[names[low.index("close")]]
+            for date, sym, close in zip(dates, syms, closes):
+                yield _day_ordinal(date), {str(sym).strip().upper(): _float(close)}
+        elif "close" in low:
+            sym = _file_symbol(path)
+            for date, close in zip(dates, cols[names[low.index("close")]]):
+                yield _day_ordinal(date), {sym: _float(close)}
+        else:
+            wide = [(n.upper(), cols[n]) for n in names if n.lower() != "date"]
+            for k, date in enumerate(dates):
+                yield _day_ordinal(date), {sym: _float(col[k]) for sym, col in wide}
+
+def build_replay(src, dest, chunk_days=REPLAY_CHUNK_DAYS):
+    """Convert a CSV or Parquet price export into a replay store at ``dest``.
+
+    The source is streamed twice and must be sorted by date. Layout: a fixed
+    header (magic, version, columns, rows, dates offset, metadata offset,
+    metadata length), the closes as one days x symbols float64 block
+    starting at SAVE_ALIGN with NaN for missing quotes, the int64 date
+    ordinals, then a JSON block with the symbols and each one's first close.
+    Returns the number of trading days written.
+    """
+    read = _parquet_rows if src.lower().endswith(".parquet") else _csv_rows
+    # A long file only names its symbols as it goes, so a first pass
+    # collects them; both passes stream.
+    symbols = sorted({sym for _, quotes in read(src) for sym in quotes})
+    if not symbols:
+        raise ValueError(f"{src} has no price rows")
+    index = {sym: i for i, sym in enumerate(symbols)}
+
+    block = np.full((chunk_days, len(symbols)), np.nan)
+    dates, n_rows, filled = [], 0, 0
+    firsts = np.full(len(symbols), np.nan)
+    offset = -(-REPLAY_HEADER.size // SAVE_ALIGN) * SAVE_ALIGN
+    tmp = f"{dest}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * offset)
+
+            def flush(count):
+                part = block[:count]
+                todo = np.isnan(firsts)
+                if todo.any():
+                    valid = ~np.isnan(part[:, todo])
+                    has = valid.any(axis=0)
+                    cols = np.flatnonzero(todo)[has]
+                    firsts[cols] = part[valid[:, has].argmax(axis=0), cols]
+                f.write(part.astype("<f8").tobytes())
+                block[:count] = np.nan
+
+            for date, quotes in read(src):
+                if not dates or date != dates[-1]:
+                    if dates and date < dates[-1]:
+                        raise ValueError(f"{src} is not sorted by date")
+                    if filled == chunk_days:
+                        flush(filled)
+                        filled = 0
+                    dates.append(date)
+                    filled += 1
+                    n_rows += 1
+                for sym, close in quotes.items():
+                    i = index.get(sym)
+                    if i is not None and close > 0:
+                        block[filled - 1, i] = close
+            flush(filled)
+
+            dates_offset = f.tell()
+            f.write(np.array(dates, dtype="<i8").tobytes())
+            meta = json.dumps({"symbols": symbols,
+                               "first": [None if np.isnan(v) else float(v) for v in firsts],
+                               "source": os.path.basename(src)}).encode("utf-8")
+            meta_offset = f.tell()
+            f.write(meta)
+            f.seek(0)
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(symbols), n_rows,
+                                       dates_offset, meta_offset, len(meta)))
+        os.replace(tmp, dest)
+    except BaseException:
+        # Never leave a half-written store behind (unsorted input, bad rows...)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return n_rows
+
+def replay_store(src):
+    # CSV and Parquet exports are converted once; the store is rebuilt when
+    # the export is newer than it.
+    if src.endswith(REPLAY_SUFFIX):
+        return src
+    dest = os.path.splitext(src)[0] + REPLAY_SUFFIX
+    if not os.path.exists(dest) or os.path.getmtime(dest) < os.path.getmtime(src):
+        build_replay(src, dest)
+    return dest
+
+def fill_gaps(block, carry):
+    """Forward-fill NaNs down each column of ``block``, seeded with ``carry``."""
+    missing = np.isnan(block)
+    if not missing.any():
+        return block
+    pos = np.where(missing, -1, np.arange(len(block))[:, None])
+    np.maximum.accumulate(pos, axis=0, out=pos)
+    filled = block[np.maximum(pos, 0), np.arange(block.shape[1])]
+    return np.where(pos < 0, carry, filled)
+
+class ReplayFeed:
+    """Synchronized cursor over a replay store, one row per trading day.
+
+    The closes are memory-mapped and pulled ``chunk_days`` dates at a time
+    for the requested symbols only; gaps (holidays, halts, symbols not yet
+    listed) are forward-filled per chunk, and before its first quote a
+    symbol sits at its first close.
+    """
+
+    def __init__(self, path, symbols=None, start=None, chunk_days=REPLAY_CHUNK_DAYS):
+        self.path = os.path.abspath(path)
+        with open(path, "rb") as f:
+            head = f.read(REPLAY_HEADER.size)
+            if len(head) < REPLAY_HEADER.size:
+                raise ValueError(f"{path} is not a replay file")
+            (magic, version, n_cols, n_rows,
+             dates_offset, meta_offset, meta_len) = REPLAY_HEADER.unpack(head)
+            if magic != REPLAY_MAGIC:
+                raise ValueError(f"{path} is not a replay file")
+            if version != REPLAY_VERSION:
+                raise ValueError(f"unsupported replay version {version} in {path}")
+            f.seek(meta_offset)
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+        if not n_rows:
+            raise ValueError(f"{path} has no trading days")
+        offset = -(-REPLAY_HEADER.size // SAVE_ALIGN) * SAVE_ALIGN
+        self.data = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(n_rows, n_cols))
+        self.dates = np.fromfile(path, dtype="<i8", count=n_rows, offset=dates_offset)
+        columns = {sym: j for j, sym in enumerate(meta["symbols"])}
+        firsts = np.array([np.nan if v is None else v for v in meta["first"]])
+        self.symbols = [sym for sym in meta["symbols"] if firsts[columns[sym]] > 0]
+        if symbols is not None:
+            self.symbols = list(symbols)
+            missing = [sym for sym in self.symbols
+                       if sym not in columns or not firsts[columns[sym]] > 0]
+            if missing:
+                raise ValueError(f"{path} has no prices for {', '.join(missing[:10])}"
+                                 + (f" and {len(missing) - 10} more" if len(missing) > 10 else ""))
+        self.cols = np.array([columns[sym] for sym in self.symbols], dtype=np.intp)
+        self.firsts = firsts[self.cols]
+        self.chunk_days = chunk_days
+        cursor = 0
+        if start is not None:
+            cursor = int(np.searchsorted(self.dates, _day_ordinal(start)))
+            if cursor >= n_rows:
+                raise ValueError(f"{path} ends on {self.date_at(n_rows - 1)}, before {start}")
+        self.seek(cursor)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def done(self):
+        return self.cursor >= len(self.dates) - 1
+
+    def date_at(self, cursor):
+        return datetime.date.fromordinal(int(self.dates[cursor])).isoformat()
+
+    @property
+    def date(self):
+        return self.date_at(self.cursor)
+
+    def seek(self, cursor):
+        """Position on row ``cursor``; ``prices`` become that day's closes."""
+        self.cursor = cursor
+        self.chunk, self.chunk_lo = None, 0
+        # Walk back a chunk at a time for each symbol's last quote on or before
+        # the cursor; symbols that had not listed yet take their first close.
+        prices = np.full(len(self.cols), np.nan)
+        hi = cursor + 1
+        while hi > 0 and np.isnan(prices).any():
+            lo = max(0, hi - self.chunk_days)
+            block = self.data[lo:hi, self.cols]
+            valid = ~np.isnan(block)
+            todo = valid.any(axis=0) & np.isnan(prices)
+            last = hi - lo - 1 - valid[::-1].argmax(axis=0)
+            prices[todo] = block[last[todo], np.flatnonzero(todo)]
+            hi = lo
+        gaps = np.isnan(prices)
+        prices[gaps] = self.firsts[gaps]
+        self.prices = prices
+
+    def next_row(self):
+        """Advance one trading day and return its closes, or None past the end."""
+        if self.done:
+            return None
+        self.cursor += 1
+        if self.chunk is None or self.cursor >= self.chunk_lo + len(self.chunk):
+            lo = self.cursor
+            self.chunk = fill_gaps(self.data[lo:lo + self.chunk_days, self.cols], self.prices)
+            self.chunk_lo = lo
+        self.prices = self.chunk[self.cursor - self.chunk_lo]
+        return self.prices
+
+# -------------------------------- save / load ------------------------------------
+
+def snapshot_game(engine, portfolio, bank):
+    """Serialize the game into (header + JSON bytes, history array).
+
+    Layout: a fixed struct header (magic, version, JSON length, day,
+    history first day, rows, columns, cash, bank balance, bank rate, loan,
+    history offset), a JSON block for the variable-sized state, padding,
+    then the price history as one contiguous little-endian float64 block.
+    The history is copied so the snapshot can be written from another thread.
+    """
+    engine.history.release()
+    rows = np.array(engine.history.rows(), dtype="<f8", order="C")
+    extra = json.dumps({
+        "symbols": engine.symbols,
+        "prices": engine.prices.tolist(),
+        "mins": engine.history.mins.tolist(),
+        "maxs": engine.history.maxs.tolist(),
+        "cost_basis": portfolio.ledger.method,
+        "trades": [portfolio.ledger.day.tolist(), portfolio.ledger.sym.tolist(),
+                   portfolio.ledger.shares.tolist(), portfolio.ledger.price.tolist()],
+        "schedule": engine.scheduler.entries(),
+        "rng": engine.rng.bit_generator.state,
+        "replay": None if engine.feed is None else [engine.feed.path, engine.feed.cursor,
+                                                    engine.replay_over],
+    }).encode("utf-8")
+    offset = SAVE_HEADER.size + len(extra)
+    offset += -offset % SAVE_ALIGN
+    header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, len(extra), engine.day,
+                              engine.history.first_day, rows.shape[0], rows.shape[1],
+                              portfolio.cash, bank.balance, bank.annual_rate, bank.loan, offset)
+    return (header + extra).ljust(offset, b"\0"), rows
+
+def write_snapshot(path, snapshot):
+    # Written to a temporary file and renamed so a crash never leaves a torn save
+    head, rows = snapshot
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    # A private temp name, so a manual save and the autosaver never share one
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def save_game(path, engine, portfolio, bank):
+    write_snapshot(path, snapshot_game(engine, portfolio, bank))
+
+def load_game(path, symbols=STOCKS):
+    """Read a save file; the price history is memory-mapped, not read."""
+    with open(path, "rb") as f:
+        head = f.read(SAVE_HEADER.size)
+        if len(head) < SAVE_HEADER.size:
+            raise ValueError(f"{path} is not a Stock Treasure save file")
+        (magic, version, extra_len, day, first_day, n_rows, n_cols,
+         cash, balance, rate, loan, offset) = SAVE_HEADER.unpack(head)
+        if magic != SAVE_MAGIC:
+            raise ValueError(f"{path} is not a Stock Treasure save file")
+        if not 1 <= version <= SAVE_VERSION:
+            raise ValueError(f"unsupported save version {version} in {path}")
+        extra = json.loads(f.read(extra_len).decode("utf-8"))
+    if list(extra["symbols"]) != list(symbols):
+        raise ValueError("save file was made with a different stock universe")
+
+    bank = Bank(annual_rate=rate)
+    bank.balance, bank.loan = balance, loan
+    portfolio = Portfolio(cash=cash, symbols=extra["symbols"],
+                          cost_basis=extra.get("cost_basis", "average"))
+    if version >= 2:
+        # Replaying the trades rebuilds the lots and every running aggregate
+        for t_day, i, shares, price in zip(*extra["trades"]):
+            portfolio.ledger.record(i, shares, price, t_day)
+    else:
+        # Version 1 only kept positions; each becomes one lot at its average cost
+        holdings, paid = extra["holdings"], extra["total_paid"]
+        if isinstance(holdings, dict):
+            holdings = [holdings[sym] for sym in extra["symbols"]]
+            paid = [paid[sym] for sym in extra["symbols"]]
+        for i, (shares, cost) in enumerate(zip(holdings, paid)):
+            if shares:
+                portfolio.ledger.record(i, shares, cost / shares, 0)
+
+    engine = MarketEngine(extra["symbols"], bank=bank, portfolio=portfolio)
+    engine.day = day
+    engine.prices[:] = extra["prices"]
+    engine.rng.bit_generator.state = extra["rng"]
+    # Copy-on-write mapping: pages are read lazily and edits never reach the file
+    data = np.memmap(path, dtype="<f8", mode="c", offset=offset, shape=(n_rows, n_cols))
+    engine.history = PriceHistory.from_buffer(extra["symbols"], data, first_day,
+                                              extra["mins"], extra["maxs"])
+    if extra.get("replay"):
+        # Saves from before the end flag was kept hold only [path, cursor]
+        replay_path, cursor, over = (extra["replay"] + [False])[:3]
+        if not os.path.exists(replay_path):
+            raise ValueError(f"the replay data this game was playing is gone: {replay_path}")
+        engine.feed = ReplayFeed(replay_path, extra["symbols"])
+        engine.feed.seek(cursor)
+        engine.replay_over = over
+    if "schedule" in extra:
+        engine.scheduler = EventScheduler.from_entries(extra["schedule"])
+    else:
+        # Older saves kept at most one pending tip; interest ran on day % 30
+        engine.reset_schedule()
+        if extra.get("pending_hint"):
+            due, sym, friend = extra["pending_hint"]
+            engine.scheduler.schedule(due, "hint", [sym, friend], engine.index[sym])
+    return engine, portfolio, bank
+
+class AutoSaver:
+    """Saves every ``every`` days on a background thread.
+
+    The state is snapshotted on the caller's thread so the writer never
+    races with the simulation; if a save is still running the next one is
+    skipped rather than queued.
+    """
+
+    def __init__(self, path=SAVE_PATH, every=0):
+        self.path = path
+        self.every = every
+        self.last_day = None
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self.future = None
+        self.error = None
+
+    def maybe_save(self, engine, portfolio, bank):
+        if not self.every:
+            return False
+        if self.last_day is None:
+            self.last_day = engine.day
+        if engine.day - self.last_day < self.every:
+            return False
+        if self.future is not None and not self.future.done():
+            return False
+        self.last_day = engine.day
+        self.save(engine, portfolio, bank)
+        return True
+
+    def save(self, engine, portfolio, bank):
+        snapshot = snapshot_game(engine, portfolio, bank)
+        self.future = self.pool.submit(write_snapshot, self.path, snapshot)
+        self.future.add_done_callback(self._record_error)
+        return self.future
+
+    def save_now(self, engine, portfolio, bank):
+        # Runs on the same single writer, after any autosave in flight, so an
+        # older snapshot can never land on top of this one
+        snapshot = snapshot_game(engine, portfolio, bank)
+        self.pool.submit(write_snapshot, self.path, snapshot).result()
+
+    def _record_error(self, future):
+        self.error = future.exception()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+# -------------------------------- strategy simulation ----------------------------
+
+SIM_MAX_DAYS      = 3650   # a headless game that has not reached the target by now is over
+
+def net_worth(portfolio, bank, engine):
+    return portfolio.value(engine.prices) + bank.balance
+
+def _sell_all(portfolio, engine):
+    held = np.flatnonzero(portfolio.holdings)
+    if held.size:
+        portfolio.sell_many(held, portfolio.holdings[held], engine.prices[held], engine.day)
+
+def _buy_max(portfolio, engine, sym):
+    price = engine.price(sym)
+    shares = int(portfolio.cash // price)
+    if shares:
+        portfolio.buy(sym, shares, price, engine.day)
+
+def _buy_equal_weight(portfolio, engine):
+    shares = (portfolio.cash / len(engine.symbols) // engine.prices).astype(np.int64)
+    idx = np.flatnonzero(shares)
+    if idx.size:
+        portfolio.buy_many(idx, shares[idx], engine.prices[idx], engine.day)
+
+# A strategy is called as strategy(res, engine, portfolio, bank) once before
+# the first day (res is None) and after every MarketEngine.step.
+
+def buy_and_hold(res, engine, portfolio, bank):
+    if res is None:
+        _buy_equal_weight(portfolio, engine)
+
+def follow_hints(res, engine, portfolio, bank):
+    if res is None:
+        _buy_equal_weight(portfolio, engine)
+    elif res.new_hint is not None:
+        _sell_all(portfolio, engine)
+        _buy_max(portfolio, engine, res.new_hint[1])
+
+def leveraged_hints(res, engine, portfolio, bank):
+    if res is None:
+        ok, _ = bank.borrow(MAX_LOAN)
+        if ok:
+            portfolio.cash += MAX_LOAN
+        _buy_equal_weight(portfolio, engine)
+    elif res.new_hint is not None:
+        _sell_all(portfolio, engine)
+        # Pay the loan off as soon as it is cheap to do so, it compounds monthly
+        if bank.loan and portfolio.cash > 2 * bank.loan:
+            paid = bank.loan
+            bank.repay(paid, portfolio.cash)
+            portfolio.cash -= paid
+        _buy_max(portfolio, engine, res.new_hint[1])
+
+STRATEGIES = {
+    "buy_and_hold": buy_and_hold,
+    "follow_hints": follow_hints,
+    "leveraged_hints": leveraged_hints,
+}
+
+def resolve_strategy(name):
+    # Either a built-in name or "module:function" for user-supplied strategies
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module, _, func = name.partition(":")
+    if not func:
+        raise ValueError(f"unknown strategy {name!r}; choose from {', '.join(STRATEGIES)} or module:function")
+    return getattr(importlib.import_module(module), func)
+
+def simulate_game(strategy, seed, max_days=SIM_MAX_DAYS, replay=None):
+    """Play one headless game; returns (days_to_target or -1, final net worth, defaulted).
+
+    ``replay`` is an optional (replay store path, start date) pair; without a
+    start date each game begins on a trading day drawn from its seed.
+    """
+    bank = Bank()
+    if replay is None:
+        engine = MarketEngine(STOCKS, bank=bank, seed=seed)
+    else:
+        path, start = replay
+        feed = ReplayFeed(path, start=start)
+        engine = MarketEngine(feed.symbols, bank=bank, seed=seed)
+        if start is None:
+            feed.seek(int(engine.rng.integers(len(feed))))
+        engine.attach_replay(feed)
+    portfolio = engine.portfolio = Portfolio(symbols=engine.symbols)
+    strategy(None, engine, portfolio, bank)
+    reached = -1
+    while engine.day < max_days:
+        res = engine.step()
+        if res.replay_end:
+            break
+        strategy(res, engine, portfolio, bank)
+        if net_worth(portfolio, bank, engine) >= TARGET_NET_WORTH:
+            reached = engine.day
+            break
+    final = net_worth(portfolio, bank, engine)
+    return reached, final, final < bank.loan
+
+def _simulate_chunk(args):
+    name, seed, start, stop, max_days, replay = args
+    strategy = resolve_strategy(name)
+    # Seeding by (seed, game index) keeps results independent of chunking and workers
+    return [simulate_game(strategy, [seed, i], max_days, replay) for i in range(start, stop)]
+
+def run_batch(name, games, seed=0, workers=None, max_days=SIM_MAX_DAYS, replay=None):
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, min(500, -(-games // (workers * 4))))
+    jobs = [(name, seed, i, min(i + chunk, games), max_days, replay) for i in range(0, games, chunk)]
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.extend(_simulate_chunk(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_simulate_chunk, jobs):
+                results.extend(part)
+    days, final, defaulted = (np.array(col) for col in zip(*results))
+    return days, final, defaulted
+
+def summarize(days, final, defaulted):
+    hit = days[days >= 0]
+    pct = lambda a, q: float(np.percentile(a, q)) if a.size else None
+    return {
+        "games": int(days.size),
+        "reached_rate": float(hit.size / days.size),
+        "days_to_target": {"mean": float(hit.mean()) if hit.size else None,
+                           "p5": pct(hit, 5), "p50": pct(hit, 50), "p95": pct(hit, 95)},
+        "final_net_worth": {"mean": float(final.mean()), "p5": pct(final, 5),
+                            "p50": pct(final, 50), "p95": pct(final, 95)},
+        "default_rate": float(defaulted.mean()),
+    }
+
+def simulate_main(args):
+    names = list(STRATEGIES) if args.strategy == "all" else [args.strategy]
+    replay = None
+    if args.replay:
+        replay = (replay_store(args.replay), args.replay_start)
+        ReplayFeed(replay[0], start=replay[1])     # fail here rather than in every worker
+    report = {}
+    for name in names:
+        t0 = time.perf_counter()
+        summary = summarize(*run_batch(name, args.games, args.seed, args.workers,
+                                       args.max_days, replay))
+        summary["seconds"] = time.perf_counter() - t0
+        report[name] = summary
+        if not args.json:
+            d, f = summary["days_to_target"], summary["final_net_worth"]
+            fmt = lambda v: "-" if v is None else f"{v:,.0f}"
+            print(f"{name}: {summary['games']} games in {summary['seconds']:.1f}s")
+            print(f"  reached ${TARGET_NET_WORTH:,.0f}: {summary['reached_rate']*100:.1f}%"
+                  f"  days mean {fmt(d['mean'])}  p5/p50/p95 {fmt(d['p5'])}/{fmt(d['p50'])}/{fmt(d['p95'])}")
+            print(f"  final net worth p5/p50/p95 ${fmt(f['p5'])}/${fmt(f['p50'])}/${fmt(f['p95'])}"
+                  f"  loan default rate {summary['default_rate']*100:.2f}%")
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+# -------------------------------- chart ------------------------------------------
+
+def lttb(values, n):
+    """Largest-Triangle-Three-Buckets downsampling; returns the kept indices."""
+    size = len(values)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.intp)
+    keep = np.empty(n, dtype=np.intp)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for b in range(n - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < n - 1:
+            nxt = values[edges[b + 1]:edges[b + 2]]
+            avg_x, avg_y = (edges[b + 1] + edges[b + 2] - 1) / 2.0, nxt.mean()
+        else:
+            avg_x, avg_y = size - 1, values[-1]
+        xs = np.arange(lo, hi)
+        area = np.abs((a - avg_x) * (values[lo:hi] - values[a]) - (a - xs) * (avg_y - values[a]))
+        a = lo + int(area.argmax())
+        keep[b + 1] = a
+    return keep
+
+class PriceChart:
+    """Line chart whose canvas items are created once and then moved.
+
+    The y axis keeps CHART_HEADROOM above the max so that on most day
+    advances the scale is unchanged; the dots are then shifted with a single
+    move() and the oldest one is recycled as the newest point.
+    """
+
+    def __init__(self, canvas, points=CHART_POINTS, width=570, height=120, pad=10):
+        self.canvas = canvas
+        self.points = points
+        self.w, self.h, self.pad = width, height, pad
+        c = canvas
+        c.create_line(pad, height+pad, width+pad, height+pad, fill="#eebc3", width=2)
+        c.create_line(pad, pad, pad, height+pad, fill="#eebc3", width=2)
+        self.line = c.create_line(0, 0, 0, 0, fill="#a6e3e9", width=3, state="hidden")
+        self.dots = deque(c.create_oval(0, 0, 0, 0, fill="#eebc3", outline="#232946",
+                                        state="hidden", tags="chart_dot")
+                          for _ in range(points))
+        self.txt_price = c.create_text(width+pad-10, pad+20, text="",
+                                       font=("Segoe UI",13), fill="#eebc3")
+        self.txt_min = c.create_text(pad+20, height+pad+20, text="",
+                                     font=("Segoe UI",11), fill="#b8c1ec")
+        self.txt_max = c.create_text(width+pad-30, height+pad+20, text="",
+                                     font=("Segoe UI",11), fill="#b8c1ec")
+        self.txt_title = c.create_text(width//2, pad+10, text="",
+                                       font=("Segoe UI Semibold",16), fill="#b8c1ec")
+        PROFILER.count("canvas.items_created", points + 7)
+        self.texts = {}
+        self.shown = 0             # dots currently visible
+        self.key = None            # (sym, zoom) drawn last time
+        self.last = None           # (day, price) of the newest point drawn
+        self.scale = None          # (lo, hi) price range mapped onto the y axis
+        self.full_redraws = 0
+        self.appends = 0
+
+    def set_text(self, item, text):
+        if self.texts.get(item) != text:
+            self.texts[item] = text
+            self.canvas.itemconfig(item, text=text)
+
+    def show_dots(self, n):
+        for i, dot in enumerate(self.dots):
+            if (i < n) != (i < self.shown):
+                self.canvas.itemconfig(dot, state="normal" if i < n else "hidden")
+        self.shown = n
+
+    def y(self, prices):
+        lo, hi = self.scale
+        return self.pad + self.h - (prices - lo) / (hi - lo) * self.h
+
+    def show(self, history, sym, zoom=False):
+        mn, mx = history.minmax(sym)
+        series = history.series(sym) if zoom else history.window(sym, self.points)
+        n = len(series)
+        title = f"{STOCK_GRAPHICS.get(sym,'')} {sym}"
+        self.set_text(self.txt_title, f"{title} · all {len(history)} days" if zoom else title)
+        self.set_text(self.txt_price, f"${series[-1]:.2f}")
+        self.set_text(self.txt_min, f"Min: ${mn:.2f}")
+        self.set_text(self.txt_max, f"Max: ${mx:.2f}")
+        if n < 2:
+            self.canvas.itemconfig(self.line, state="hidden")
+            self.show_dots(0)
+            self.key = self.last = None
+            return
+
+        key = (sym, zoom)
+        last = (history.first_day + len(history) - 1, float(series[-1]))
+        rescale = self.scale is None or mn < self.scale[0] or mx > self.scale[1] or key != self.key
+        if rescale:
+            self.scale = (mn, mx + (mx - mn or 1) * CHART_HEADROOM)
+        elif last == self.last:
+            return
+        step = self.w / (self.points - 1)
+        incremental = (not rescale and not zoom and n == self.points == self.shown
+                       and self.last is not None and last[0] == self.last[0] + 1)
+        self.key, self.last = key, last
+
+        if zoom:
+            idx = lttb(series, CHART_ZOOM_POINTS)
+            xs = self.pad + idx * (self.w / (n - 1))
+            ys = self.y(series[idx])
+        else:
+            xs = self.pad + np.arange(n) * (self.w / (n - 1))
+            ys = self.y(series)
+        flat = np.empty(2 * len(xs))
+        flat[0::2], flat[1::2] = xs, ys
+        self.canvas.coords(self.line, *flat.tolist())
+        self.canvas.itemconfig(self.line, state="normal")
+
+        if zoom:
+            self.show_dots(0)
+        elif incremental:
+            # Same scale, window slid by one day: shift every dot and reuse the oldest
+            self.canvas.move("chart_dot", -step, 0)
+            self.dots.rotate(-1)
+            x, y = xs[-1], ys[-1]
+            self.canvas.coords(self.dots[-1], x-3, y-3, x+3, y+3)
+            self.appends += 1
+            PROFILER.count("canvas.items_moved", self.points)
+        else:
+            for dot, x, y in zip(self.dots, xs.tolist(), ys.tolist()):
+                self.canvas.coords(dot, x-3, y-3, x+3, y+3)
+            self.show_dots(n)
+            self.full_redraws += 1
+            PROFILER.count("canvas.items_moved", n + 1)
+
+# -------------------------------- universe ---------------------------------------
+
+SEARCH_LIMIT      = 50       # symbols offered in the chart picker at once
+TABLE_ROWS        = 13       # stock table rows on screen; only these become Treeview items
+LOG_DETAIL_MAX_SYMBOLS = 100 # larger universes default to --log-level info
+
+def load_universe(path):
+    """Read a watchlist CSV with columns symbol, name and optionally graphic.
+
+    A header row is optional; graphics found in the file are added to
+    STOCK_GRAPHICS. Returns {symbol: name} in file order.
+    """
+    universe = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].startswith("#"):
+                continue
+            sym = row[0].strip().upper()
+            if sym == "SYMBOL" and not universe:
+                continue
+            universe[sym] = row[1].strip() if len(row) > 1 and row[1].strip() else sym
+            if len(row) > 2 and row[2].strip():
+                STOCK_GRAPHICS.setdefault(sym, row[2].strip())
+    if not universe:
+        raise ValueError(f"no symbols found in {path}")
+    return universe
+
+class SymbolIndex:
+    """Prefix and fuzzy lookup over symbols and company names.
+
+    Prefix queries bisect two sorted key lists, symbols and the words of
+    each name, and symbol hits always rank first. Fuzzy queries score
+    candidates from a trigram index, so typos still find the company
+    without scanning the whole universe.
+    """
+
+    def __init__(self, universe):
+        self.universe = universe
+        self.sym_keys = sorted((sym.lower(), sym) for sym in universe)
+        name_keys = []
+        self.trigrams = {}
+        for sym, name in universe.items():
+            for word in name.lower().replace(".", " ").replace(",", " ").split():
+                name_keys.append((word, sym))
+            for gram in self.grams(f"{sym} {name}"):
+                self.trigrams.setdefault(gram, set()).add(sym)
+        name_keys.sort()
+        self.name_keys = name_keys
+
+    @staticmethod
+    def grams(text):
+        text = f" {text.lower()} "
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def _starting(keys, query, limit):
+        start = bisect.bisect_left(keys, (query,))
+        hits = []
+        for word, sym in keys[start:start + limit]:
+            if not word.startswith(query):
+                break
+            hits.append(sym)
+        return hits
+
+    def prefix(self, query, limit=SEARCH_LIMIT):
+        query = query.lower()
+        out = self._starting(self.sym_keys, query, limit)     # an exact symbol sorts first
+        seen = set(out)
+        if len(out) < limit:
+            # A name can hold several matching words, so ask for a few spare
+            for sym in self._starting(self.name_keys, query, 4 * limit):
+                if sym not in seen:
+                    seen.add(sym)
+                    out.append(sym)
+        return out[:limit]
+
+    def fuzzy(self, query, limit=SEARCH_LIMIT, min_score=0.3):
+        grams = self.grams(query)
+        scores = {}
+        for gram in grams:
+            for sym in self.trigrams.get(gram, ()):
+                scores[sym] = scores.get(sym, 0) + 1
+        ranked = sorted((-n / len(grams), sym) for sym, n in scores.items()
+                        if n / len(grams) >= min_score)
+        return [sym for _, sym in ranked[:limit]]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = query.strip()
+        if not query:
+            return sorted(self.universe)[:limit]
+        out = self.prefix(query, limit)
+        if len(out) < limit and len(query) >= 3:
+            out += [sym for sym in self.fuzzy(query, limit) if sym not in out]
+        return out[:limit]
+
+# -------------------------------- price loading ----------------------------------
+
+def yfinance_quote(sym, timeout=FETCH_TIMEOUT):
+    import yfinance as yf
+    hist = yf.Ticker(sym).history(period="5d", interval="1d", timeout=timeout)
+    if hist.empty:
+        raise LookupError("no price data returned")
+    return hist.index[-1].date().isoformat(), float(hist["Close"].iloc[-1])
+
+class StubPriceSource:
+    """Offline stand-in for yfinance_quote that simulates network latency.
+
+    Repeated quotes for a symbol random-walk from the first one, so a live
+    refresh against it sees small moves rather than new random prices.
+    """
+
+    def __init__(self, latency=0.5, fail_rate=0.0, seed=None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.last = {}
+
+    def __call__(self, sym, timeout=FETCH_TIMEOUT):
+        with self.lock:
+            fail = self.rng.random() < self.fail_rate
+            price = self.rng.uniform(20.0, 500.0)
+            if sym in self.last:
+                price = self.last[sym] * (1 + (price - 260.0) / 24000.0)   # within +-1%
+            self.last[sym] = price
+        time.sleep(min(self.latency, timeout))
+        if fail:
+            raise ConnectionError("simulated network failure")
+        return datetime.date.today().isoformat(), price
+
+class PriceCache:
+    """On-disk SQLite store of daily closes keyed by (symbol, date)."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, keep_days=CACHE_KEEP_DAYS):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.keep_days = keep_days
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS prices (
+                symbol     TEXT NOT NULL,
+                date       TEXT NOT NULL,
+                close      REAL NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (symbol, date)
+            )""")
+        self.conn.commit()
+
+    def latest(self, symbols):
+        # {sym: (date, close, fetched_at)} for the newest cached row of each symbol
+        rows = self.conn.execute("""
+            SELECT symbol, date, close, fetched_at FROM prices AS p
+            WHERE date = (SELECT MAX(date) FROM prices WHERE symbol = p.symbol)""")
+        wanted = set(symbols)
+        return {sym: (date, close, fetched) for sym, date, close, fetched in rows if sym in wanted}
+
+    def stale(self, symbols, now=None):
+        now = time.time() if now is None else now
+        latest = self.latest(symbols)
+        return [sym for sym in symbols
+                if sym not in latest or now - latest[sym][2] > self.ttl]
+
+    def store_many(self, quotes, fetched_at=None):
+        # quotes: iterable of (sym, date, close)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO prices (symbol, date, close, fetched_at) VALUES (?, ?, ?, ?)",
+                [(sym, date, close, fetched_at) for sym, date, close in quotes])
+
+    def evict(self, today=None):
+        today = today or datetime.date.today()
+        cutoff = (today - datetime.timedelta(days=self.keep_days)).isoformat()
+        with self.conn:
+            return self.conn.execute("DELETE FROM prices WHERE date < ?", (cutoff,)).rowcount
+
+    def close(self):
+        self.conn.close()
+
+class PriceLoader:
+    """Fetches quotes for many symbols on a bounded thread pool.
+
+    Runs entirely off the Tk thread; results are pushed onto ``results`` as
+    ("price", sym, (date, close)), ("error", sym, message), ("timeout", sym,
+    seconds) and finally ("done", None, elapsed) for the UI to drain.
+    """
+
+    def __init__(self, symbols, source=yfinance_quote,
+                 workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT):
+        self.symbols = list(symbols)
+        self.source = source
+        self.workers = max(1, min(workers, len(self.symbols) or 1))
+        self.timeout = timeout
+        self.results = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="PriceLoader", daemon=True)
+        self.thread.start()
+        return self
+
+    def _fetch(self, sym, started):
+        started[sym] = time.monotonic()
+        return self.source(sym, self.timeout)
+
+    def _run(self):
+        t0 = time.monotonic()
+        started = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch")
+        pending = {pool.submit(self._fetch, sym, started): sym for sym in self.symbols}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    sym = pending.pop(fut)
+                    try:
+                        self.results.put(("price", sym, fut.result()))
+                    except Exception as exc:
+                        self.results.put(("error", sym, f"{type(exc).__name__}: {exc}"))
+                now = time.monotonic()
+                for fut, sym in list(pending.items()):
+                    if sym in started and now - started[sym] > self.timeout:
+                        del pending[fut]
+                        self.results.put(("timeout", sym, self.timeout))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.results.put(("done", None, time.monotonic() - t0))
+
+    def drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+class LiveRefresher:
+    """Polls a quote source every ``interval`` seconds off the Tk thread.
+
+    Only one refresh round runs at a time. Ticks that fall due while a round
+    is still in flight, and refresh_now() calls, collapse into a single
+    follow-up round, and a symbol whose previous request has not returned is
+    never asked for again. A symbol whose quote fails is skipped with
+    exponential backoff (capped at LIVE_BACKOFF_MAX) until it succeeds.
+    Each round pushes one ("prices", {sym: (date, close)}, elapsed) batch and,
+    if anything failed, one ("errors", {sym: message}, None) onto ``results``.
+    """
+
+    def __init__(self, symbols, source=yfinance_quote, interval=60.0,
+                 workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT):
+        self.symbols = list(symbols)
+        self.source = source
+        self.interval = interval
+        self.timeout = timeout
+        self.results = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(self.symbols) or 1)),
+                                       thread_name_prefix="live")
+        self.failures = {}         # symbol -> consecutive failures
+        self.retry_at = {}         # symbol -> monotonic time of its next attempt
+        self.inflight = set()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.rounds = 0
+        self.coalesced = 0
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="LiveRefresher", daemon=True)
+        self.thread.start()
+        return self
+
+    def refresh_now(self):
+        self.wake.set()
+
+    def close(self):
+        self.stopping.set()
+        self.wake.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        due = time.monotonic()
+        while not self.stopping.is_set():
+            self.wake.wait(max(0.0, due - time.monotonic()))
+            if self.stopping.is_set():
+                return
+            self.wake.clear()
+            start = time.monotonic()
+            self._round(start)
+            self.rounds += 1
+            # Ticks that passed during a slow round are merged into the next one
+            missed = int((time.monotonic() - start) // self.interval)
+            self.coalesced += missed
+            due = start + (missed + 1) * self.interval
+
+    def _fetch(self, sym):
+        try:
+            return self.source(sym, self.timeout)
+        finally:
+            self.inflight.discard(sym)
+
+    def _round(self, now):
+        todo = [sym for sym in self.symbols
+                if sym not in self.inflight and self.retry_at.get(sym, 0.0) <= now]
+        self.inflight.update(todo)
+        try:
+            pending = {self.pool.submit(self._fetch, sym): sym for sym in todo}
+        except RuntimeError:       # closed while the round was starting
+            return
+        done, late = wait(pending, timeout=self.timeout)
+        prices, errors = {}, {}
+        for fut in done:
+            sym = pending[fut]
+            try:
+                prices[sym] = fut.result()
+            except Exception as exc:
+                errors[sym] = f"{type(exc).__name__}: {exc}"
+        for fut in late:
+            # Left running; _fetch clears it from ``inflight`` when it returns
+            errors[pending[fut]] = f"timed out after {self.timeout:.0f}s"
+        for sym in prices:
+            self.failures.pop(sym, None)
+            self.retry_at.pop(sym, None)
+        for sym in errors:
+            n = self.failures[sym] = self.failures.get(sym, 0) + 1
+            backoff = min(LIVE_BACKOFF_MAX, self.interval * 2 ** n)
+            self.retry_at[sym] = now + backoff * random.uniform(0.5, 1.0)
+        if todo:
+            self.results.put(("prices", prices, time.monotonic() - now))
+        if errors:
+            self.results.put(("errors", errors, None))
+
+    def drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+# -------------------------------- game log ---------------------------------------
+
+class GameLog:
+    """Buffers log lines and writes them to a Text widget once per frame.
+
+    The widget only keeps the last ``max_lines`` lines. When ``path`` is
+    given every message also goes to a rotating file, written by a
+    QueueListener thread so disk I/O never runs on the Tk thread.
+    """
+
+    def __init__(self, root, level=LOG_DETAIL, max_lines=LOG_MAX_LINES, path=None):
+        self.root = root
+        self.widget = None
+        self.level = level
+        self.max_lines = max_lines
+        self.lines = 0
+        self.pending = []
+        self.flush_id = None
+        self.file_logger = None
+        self.listener = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            records = queue.Queue()
+            self.file_logger = logging.getLogger(f"stocks.game.{id(self)}")
+            self.file_logger.propagate = False
+            self.file_logger.setLevel(level)
+            self.file_logger.addHandler(logging.handlers.QueueHandler(records))
+            self.listener = logging.handlers.QueueListener(records, handler)
+            self.listener.start()
+
+    def attach(self, widget):
+        self.widget = widget
+        self.schedule()
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def add(self, msg, level=LOG_INFO):
+        if level < self.level:
+            return
+        self.pending.append(msg)
+        if self.file_logger is not None:
+            self.file_logger.log(level, msg)
+        self.schedule()
+
+    def schedule(self):
+        if self.flush_id is None and self.pending and self.widget is not None:
+            self.flush_id = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.flush_id = None
+        if not self.pending or self.widget is None:
+            return
+        text = "\n".join(self.pending) + "\n"
+        self.pending.clear()
+        self.widget.insert("end", text)
+        added = text.count("\n")
+        self.lines += added
+        PROFILER.count("log.lines_added", added)
+        if self.lines > self.max_lines:
+            self.widget.delete("1.0", f"{self.lines - self.max_lines + 1}.0")
+            PROFILER.count("log.lines_deleted", self.lines - self.max_lines)
+            self.lines = self.max_lines
+        self.widget.see("end")
+
+    def close(self):
+        self.flush()
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+# -------------------------------- instrumentation ----------------------------------
+
+class Profiler:
+    """Opt-in latency and widget-churn statistics for the UI handlers.
+
+    Handlers are wrapped with ``instrumented``; while ``enabled`` is False
+    the wrapper costs a single attribute check. When ``frames`` is set the
+    top-level handler calls are also run under cProfile and the last
+    ``frames`` captures are kept for ``dump``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.samples = {}          # handler -> recent latencies in seconds
+        self.calls = {}
+        self.buckets = {}          # handler -> {power-of-two microsecond bucket: count}
+        self.counters = {}
+        self.captures = deque()
+        self.frames = 0
+        self.depth = 0
+
+    def enable(self, frames=0):
+        self.enabled = True
+        self.frames = frames
+        self.captures = deque(self.captures, maxlen=frames or None)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def call(self, name, fn, args, kwargs):
+        prof = cProfile.Profile() if self.frames and self.depth == 0 else None
+        self.depth += 1
+        t0 = time.perf_counter()
+        try:
+            if prof is None:
+                return fn(*args, **kwargs)
+            return prof.runcall(fn, *args, **kwargs)
+        finally:
+            dt = time.perf_counter() - t0
+            self.depth -= 1
+            if prof is not None:
+                self.captures.append(prof)
+            self.record(name, dt)
+
+    def record(self, name, dt):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=PROFILE_SAMPLES)
+            self.buckets[name] = {}
+            self.calls[name] = 0
+        self.samples[name].append(dt)
+        self.calls[name] += 1
+        bucket = max(0, int(dt * 1e6)).bit_length()
+        self.buckets[name][bucket] = self.buckets[name].get(bucket, 0) + 1
+
+    def percentiles(self, name, qs=(50, 99)):
+        return np.percentile(np.fromiter(self.samples[name], float), qs)
+
+    def report(self):
+        lines = [f"{'handler':22s} {'calls':>7s} {'p50 ms':>8s} {'p99 ms':>8s}"]
+        for name in sorted(self.samples):
+            p50, p99 = self.percentiles(name) * 1e3
+            lines.append(f"{name:22s} {self.calls[name]:7d} {p50:8.2f} {p99:8.2f}")
+        for name in sorted(self.counters):
+            lines.append(f"{name:30s} {self.counters[name]:9d}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        if not self.captures:
+            return 0
+        stats = pstats.Stats(*self.captures)
+        stats.dump_stats(path)
+        return len(self.captures)
+
+PROFILER = Profiler()
+
+def instrumented(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            return PROFILER.call(name, fn, args, kwargs)
+        return wrapper
+    return wrap
+
+# -------------------------------- UI ---------------------------------------------
+
+class StockTreasureGame(tk.Tk):
+    def __init__(self, universe=STOCKS, price_source=yfinance_quote, cache=None, offline=False, seed=None,
+                 log_level=LOG_DETAIL, log_path=LOG_PATH, load_path=None,
+                 save_path=SAVE_PATH, autosave_days=0, cost_basis="average",
+                 profile_startup=False, replay=None, live_interval=0):
+        super().__init__()
+        STARTUP_MARKS.append(("Tk root", time.perf_counter()))
+        self.title("🌟 Stock Treasure Game 🌟")
+        self.configure(bg="#16161a")
+        self.attributes("-fullscreen", True)
+
+        self.universe = universe
+        self.portfolio = Portfolio(symbols=universe, cost_basis=cost_basis)
+        self.bank = Bank()
+        self.engine = MarketEngine(universe, bank=self.bank, seed=seed, portfolio=self.portfolio)
+        if load_path is not None:
+            self.engine, self.portfolio, self.bank = load_game(load_path, universe)
+        elif replay is not None:
+            self.engine.attach_replay(replay)
+        self.save_path = save_path
+        self.autosaver = AutoSaver(save_path, autosave_days)
+        self.price_source = price_source
+        self.cache = cache
+        self.offline = offline
+        self.loader = None
+        self.live = None
+        self.live_interval = live_interval
+        self.game_log = GameLog(self, level=log_level, path=log_path)
+        self.profile_startup = profile_startup
+
+        self.chart_sym = "AAPL" if "AAPL" in universe else next(iter(universe))
+        self.symbol_index = None   # built with the chart panel
+
+        STARTUP_MARKS.append(("game state", time.perf_counter()))
+        self.create_widgets()
+        STARTUP_MARKS.append(("header, table and controls", time.perf_counter()))
+        if load_path is not None:
+            self.add_log(f"Loaded saved game from {load_path} (day {self.engine.day}).")
+        elif replay is not None:
+            self.add_log(f"📼 Replaying {len(replay) - replay.cursor} trading days of "
+                         f"{len(universe)} stocks from {replay.date}.")
+        else:
+            self.fetch_prices()
+        if self.loader is None:
+            self.start_live()
+        self.refresh_view()
+        STARTUP_MARKS.append(("cached prices and first refresh", time.perf_counter()))
+
+    # ---------------------------------------------------------------------------
+
+    def create_widgets(self):
+        # Info frame
+        info = tk.Frame(self, bg="#16151a")
+        info.pack(pady=8, fill="x")
+        self.lbl_day = tk.Label(info, text="", font=("Segoe UI Semibold", 20),
+                                fg="#b8c1ec", bg="#16161a")
+        self.lbl_day.grid(row=0, column=0, padx=14)
+        self.lbl_cash = tk.Label(info, text="", font=("Segoe UI", 16),
+                                 fg="#eebbc3", bg="#16161a")
+        self.lbl_cash.grid(row=0, column=1, padx=14)
+        self.lbl_bank = tk.Label(info, text="", font=("Segoe UI", 16),
+                                 fg="#a6e3e9", bg="#16161a")
+        self.lbl_bank.grid(row=0, column=2, padx=14)
+        self.lbl_loan = tk.Label(info, text="", font=("Segoe UI", 16),
+                                 fg="#e76f51", bg="#16161a")
+        self.lbl_loan.grid(row=0, column=3, padx=14)
+        self.lbl_networth = tk.Label(info, text="", font=("Segoe UI Semibold", 16),
+                                     fg="#b8c1ec", bg="#16161a")
+        self.lbl_networth.grid(row=0, column=4, padx=14)
+
+        # Table
+        tbl = tk.Frame(self, bg="#16161a")
+        tbl.pack(pady=8, fill="both", expand=True)
+        cols = ("graphic", "sym", "name", "shares", "avg_paid",
+                "total_paid", "price", "value", "gainloss", "realized")
+        self.tree = ttk.Treeview(tbl, columns=cols, show="headings", height=TABLE_ROWS)
+        for c in cols:
+            self.tree.heading(c, text=c.replace("_", " ").title())
+            width = 52 if c == "graphic" else 125
+            self.tree.column(c, anchor="center", width=width, stretch=False)
+        self.tree_scroll = ttk.Scrollbar(tbl, orient="vertical", command=self.scroll_table)
+        self.tree_scroll.pack(side="right", fill="y", padx=(0, 10))
+        self.tree.pack(fill="x", padx=10)
+        self.tree.bind("<Double-1>", self.on_stock_double_click)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_table("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda _: self.scroll_table("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda _: self.scroll_table("scroll", 1, "units"))
+        # The table is virtual: held positions are listed first, then the rest
+        # of the universe, and only the TABLE_ROWS rows in view exist as
+        # Treeview items, keyed by symbol (see sync_table)
+        self.tree_cols = cols
+        self.row_cache = {}        # materialized symbol -> values last pushed
+        self.row_order = list(self.universe)
+        self.held = set()
+        self.table_top = 0
+        self.shown = []
+        self.label_cache = {}
+
+        # Chart; its contents are built on first paint by build_panels
+        self.chart_frame = tk.Frame(self, bg="#16161a")
+        self.chart_frame.pack(pady=(8, 2), fill="x")
+        self.stock_var = tk.StringVar(value=self.symbol_label(self.chart_sym))
+        self.zoom_var = tk.BooleanVar(value=False)
+        self.chart = None
+
+        # Controls – only bank actions now
+        ctrl = tk.Frame(self, bg="#16161a")
+        ctrl.pack(pady=10, fill="x")
+
+        # Bank related actions
+        tk.Button(ctrl, text="Deposit", font=("Segoe UI Semibold", 13),
+                  bg="#a6e3e9", fg="#232946",
+                  command=self.bank_deposit, width=10,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="Withdraw", font=("Segoe UI Semibold", 13),
+                  bg="#121629", fg="#eebbc3",
+                  command=self.bank_withdraw, width=10,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="Borrow", font=("Segoe UI Semibold", 13),
+                  bg="#f4a261", fg="#232946",
+                  command=self.bank_borrow, width=10,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="Repay Loan", font=("Segoe UI Semibold", 13),
+                  bg="#b8c1ec", fg="#232946",
+                  command=self.bank_repay, width=11,
+                  relief="flat").pack(side="left", padx=9)
+        self.btn_advance = tk.Button(ctrl, text="Advance Day", font=("Segoe UI Semibold", 13),
+                                     bg="#232946", fg="#eebbc3",
+                                     command=self.next_day, width=13, relief="flat")
+        self.btn_advance.pack(side="left", padx=12)
+        self.btn_ff = tk.Button(ctrl, text="Fast Forward", font=("Segoe UI Semibold", 13),
+                                bg="#232946", fg="#a6e3e9",
+                                command=self.fast_forward, width=13, relief="flat")
+        self.btn_ff.pack(side="left", padx=12)
+        tk.Button(ctrl, text="💾 Save", font=("Segoe UI Semibold", 13),
+                  bg="#a6e3e9", fg="#232946",
+                  command=self.save_state, width=8,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="📂 Load", font=("Segoe UI Semibold", 13),
+                  bg="#b8c1ec", fg="#232946",
+                  command=self.load_state, width=8,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="📒 Ledger", font=("Segoe UI Semibold", 13),
+                  bg="#121629", fg="#a6e3e9",
+                  command=self.export_ledger, width=9,
+                  relief="flat").pack(side="left", padx=9)
+        tk.Button(ctrl, text="❌ Exit", font=("Segoe UI", 13, "bold"),
+                  bg="#e76f51", fg="#22223b",
+                  command=self.quit,
+                  relief="flat", borderwidth=0,
+                  highlightthickness=0, width=10).pack(side="left", padx=9)
+        # Shown only while a fast forward is running
+        self.ff_progress = ttk.Progressbar(ctrl, length=220, mode="determinate")
+        self.ff_cancel = tk.Button(ctrl, text="Cancel", font=("Segoe UI", 12),
+                                   bg="#121629", fg="#eebbc3", relief="flat",
+                                   command=self.cancel_fast_forward)
+        self.ff = None
+
+        # Log; built on first paint as well, messages are buffered until then
+        self.log_frame = tk.Frame(self, bg="#16161a")
+        self.log_frame.pack(pady=(8, 0), fill="both", expand=False)
+
+        # Timing overlay (F9) and cProfile dump (F10), see Profiler
+        self.overlay = tk.Label(self, text="", justify="left", anchor="nw",
+                                font=("Consolas", 10), fg="#a6e3e9", bg="#121629")
+        self.overlay_job = None
+        self.bind("<F9>", lambda _: self.toggle_overlay())
+        self.bind("<F10>", lambda _: self.dump_profile())
+        self.bind("<F5>", lambda _: self.live is not None and self.live.refresh_now())
+        self.bind("<Map>", self.on_first_map)
+
+    def on_first_map(self, event):
+        if event.widget is self:
+            self.unbind("<Map>")
+            self.after_idle(self.build_panels)
+
+    def build_panels(self):
+        if self.chart is not None:
+            return
+        chart = self.chart_frame
+        tk.Label(chart, text="Stock Chart", font=("Segoe UI Semibold", 15),
+                 fg="#eebbc3", bg="#16161a").pack()
+        self.symbol_index = SymbolIndex(self.universe)
+        self.stock_menu = ttk.Combobox(chart, textvariable=self.stock_var,
+                                      values=self.symbol_choices(""),
+                                      width=28, height=12)  # increased height for visibility
+        self.stock_menu.pack(side="left", padx=10)
+        self.stock_menu.bind("<<ComboboxSelected>>", self.pick_symbol)
+        self.stock_menu.bind("<Return>", self.pick_symbol)
+        self.stock_menu.bind("<KeyRelease>", self.filter_symbols)
+        tk.Checkbutton(chart, text="All days", variable=self.zoom_var,
+                       command=self.draw_chart, font=("Segoe UI", 11),
+                       fg="#b8c1ec", bg="#16161a", selectcolor="#232946",
+                       activebackground="#16161a").pack(side="left")
+        self.chart_canvas = tk.Canvas(chart, width=600, height=160,
+                                      bg="#232946", highlightthickness=0)
+        self.chart_canvas.pack(side="left", padx=12)
+        self.chart = PriceChart(self.chart_canvas)
+
+        log = self.log_frame
+        tk.Label(log, text="Game Log", font=("Segoe UI Semibold", 13),
+                 fg="#eebbc3", bg="#16161a").pack(anchor="w", padx=10)
+        self.log_scroll = tk.Scrollbar(log)
+        self.log_scroll.pack(side="right", fill="y")
+        self.log = tk.Text(log, height=14, width=120,
+                           bg="#232946", fg="#eebbc3",
+                           font=("Consolas", 11), relief="flat",
+                           wrap="word", yscrollcommand=self.log_scroll.set)
+        self.log.pack(fill="x", padx=10)
+        self.log_scroll.config(command=self.log.yview)
+        self.game_log.attach(self.log)
+        self.draw_chart()
+        STARTUP_MARKS.append(("chart and log panels", time.perf_counter()))
+        if self.profile_startup:
+            self.after_idle(self.report_startup)
+
+    def symbol_label(self, sym):
+        return f"{sym}  {self.universe[sym]}"
+
+    def symbol_choices(self, query):
+        return [self.symbol_label(sym) for sym in self.symbol_index.search(query)]
+
+    def filter_symbols(self, event):
+        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+            return
+        self.stock_menu.config(values=self.symbol_choices(self.stock_var.get()))
+
+    def pick_symbol(self, _=None):
+        text = self.stock_var.get().strip()
+        sym = text.split()[0].upper() if text else ""
+        if sym not in self.universe:
+            matches = self.symbol_index.search(text, limit=1)
+            if not matches:
+                return
+            sym = matches[0]
+        self.chart_sym = sym
+        self.stock_var.set(self.symbol_label(sym))
+        self.stock_menu.selection_clear()
+        self.draw_chart()
+
+    def report_startup(self):
+        STARTUP_MARKS.append(("first full frame", time.perf_counter()))
+        lines = ["Startup timings (ms):"]
+        for (_, prev), (name, t) in zip(STARTUP_MARKS, STARTUP_MARKS[1:]):
+            lines.append(f"  {name:30s} {(t - prev) * 1e3:8.1f}")
+        lines.append(f"  {'total':30s} {(t - STARTUP_MARKS[0][1]) * 1e3:8.1f}")
+        print("\n".join(lines))
+        self.add_log("\n".join(lines))
+
+    # -------------------------------------------------------------------------
+
+    def fetch_prices(self):
+        cached = self.cache.latest(self.universe) if self.cache is not None else {}
+        for sym, (date, close, _) in cached.items():
+            self._set_initial_price(sym, close)
+            self.add_log(f"Cached price for {sym} ({date}): ${close:.2f}", LOG_DETAIL)
+        if self.offline:
+            self.add_log(f"Offline mode: {len(cached)}/{len(self.universe)} prices loaded from cache.")
+            return
+        stale = self.cache.stale(self.universe) if self.cache is not None else list(self.universe)
+        if not stale:
+            self.add_log("All cached prices are fresh, nothing to download.")
+            return
+        self.loader = PriceLoader(stale, source=self.price_source).start()
+        self.add_log(f"Fetching prices for {len(stale)} stocks...")
+        # Days only start once every starting price is in, so no played day is
+        # ever priced off the 1.0 placeholder
+        self.set_advance_enabled(False)
+        self.after(FETCH_POLL_MS, self._poll_prices)
+
+    def set_advance_enabled(self, enabled):
+        state = "normal" if enabled else "disabled"
+        self.btn_advance.config(state=state)
+        self.btn_ff.config(state=state)
+
+    def _set_initial_price(self, sym, close):
+        self.engine.set_price(sym, close)
+        # Only the starting point is replaced; never rewrite played days
+        if len(self.engine.history) == 1:
+            self.engine.history.set_last(self.engine.index[sym], close)
+
+    def _poll_prices(self):
+        if self.loader is None:    # abandoned, e.g. a saved game was loaded meanwhile
+            return
+        changed, finished = False, False
+        fetched = []
+        for kind, sym, val in self.loader.drain():
+            if kind == "price":
+                date, close = val
+                self._set_initial_price(sym, close)
+                fetched.append((sym, date, close))
+                self.add_log(f"Initial price for {sym}: ${close:.2f}", LOG_DETAIL)
+                changed = True
+            elif kind == "error":
+                self.add_log(f"⚠️ Could not fetch {sym}: {val}")
+            elif kind == "timeout":
+                self.add_log(f"⚠️ Timed out fetching {sym} after {val:.0f}s")
+            elif kind == "done":
+                finished = True
+                self.add_log(f"Price loading finished in {val:.2f}s.")
+        if self.cache is not None:
+            if fetched:
+                self.cache.store_many(fetched)
+            if finished:
+                self.cache.evict()
+        if changed:
+            self.refresh_view()
+        if not finished:
+            self.after(FETCH_POLL_MS, self._poll_prices)
+        else:
+            self.loader = None
+            self.set_advance_enabled(True)
+            self.start_live()
+
+    def start_live(self):
+        # Started once the initial load is over so the two never ask for the same quotes
+        if not self.live_interval or self.live is not None:
+            return
+        self.live = LiveRefresher(self.universe, source=self.price_source,
+                                  interval=self.live_interval).start()
+        self.add_log(f"📡 Live prices every {self.live_interval:g}s.")
+        self.after(LIVE_POLL_MS, self._poll_live)
+
+    def _poll_live(self):
+        if self.ff is not None:
+            # Batches wait in the queue until the fast forward has finished
+            self.after(LIVE_POLL_MS, self._poll_live)
+            return
+        changed = 0
+        for kind, batch, elapsed in self.live.drain():
+            if kind == "prices":
+                fetched = []
+                for sym, (date, close) in batch.items():
+                    if close != self.engine.price(sym):
+                        self._apply_live_price(sym, close)
+                        changed += 1
+                    fetched.append((sym, date, close))
+                if self.cache is not None and fetched:
+                    self.cache.store_many(fetched)
+                self.add_log(f"Live refresh: {len(batch)} quotes in {elapsed:.2f}s.", LOG_DETAIL)
+            elif kind == "errors":
+                names = ", ".join(sorted(batch)[:5]) + (" ..." if len(batch) > 5 else "")
+                self.add_log(f"⚠️ Live refresh: {len(batch)} quotes failed ({names}); backing off.")
+        if changed:
+            PROFILER.count("live.prices_changed", changed)
+            self.refresh_view()
+        self.after(LIVE_POLL_MS, self._poll_live)
+
+    def _apply_live_price(self, sym, close):
+        # A live quote is today's price: the current history row moves with it
+        i = self.engine.index[sym]
+        self.engine.set_price(sym, close)
+        self.engine.history.set_last(i, close)
+
+    # -------------------------------------------------------------------------
+
+    @instrumented("next_day")
+    def next_day(self):
+        if self.ff is not None or self.loader is not None:
+            return
+        res = self.engine.step()
+        self.log_day(res)
+        self.refresh_view()
+        self.autosave()
+
+    def fast_forward(self):
+        if self.ff is not None or self.loader is not None:
+            return
+        try:
+            days = int(simpledialog.askstring("Fast Forward", "Advance how many days?",
+                                              initialvalue="100", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid number of days.", parent=self)
+            return
+        if days <= 0:
+            messagebox.showerror("Error", "Days must be positive.", parent=self)
+            return
+        stops = simpledialog.askstring(
+            "Fast Forward",
+            "Stop early on: H = a friend's tip comes true, T = net worth target,\n"
+            "I = interest day (any combination, blank for none):",
+            initialvalue="HT", parent=self)
+        if stops is None:
+            return
+        stops = stops.upper()
+        self.ff = {"days": days, "done": 0, "cancelled": False,
+                   "stop": self.fast_forward_stop(stops), "t_sim": 0.0}
+        self.ff_progress.config(maximum=days, value=0)
+        self.ff_progress.pack(side="left", padx=9)
+        self.ff_cancel.pack(side="left")
+        self.after(0, self.fast_forward_chunk)
+
+    def fast_forward_stop(self, stops):
+        checks = []
+        if "H" in stops:
+            checks.append(lambda res: res.hint_hit is not None)
+        if "I" in stops:
+            checks.append(lambda res: res.interest)
+        if "T" in stops:
+            checks.append(lambda res: net_worth(self.portfolio, self.bank, self.engine) >= TARGET_NET_WORTH)
+        if not checks:
+            return None
+        return lambda res: any(check(res) for check in checks)
+
+    @instrumented("fast_forward_chunk")
+    def fast_forward_chunk(self):
+        ff = self.ff
+        if ff["cancelled"]:
+            return self.fast_forward_done(None, "cancelled")
+        t0 = time.perf_counter()
+        n, res, stopped = self.engine.advance(ff["days"] - ff["done"], ff["stop"],
+                                              deadline=t0 + FF_FRAME_BUDGET)
+        ff["t_sim"] += time.perf_counter() - t0
+        ff["done"] += n
+        if stopped:
+            return self.fast_forward_done(res, "end of replay data" if res.replay_end else "stop condition met")
+        if ff["done"] >= ff["days"]:
+            return self.fast_forward_done(res, None)
+        # Only the progress bar is touched between chunks
+        self.ff_progress.config(value=ff["done"])
+        self.after(1, self.fast_forward_chunk)
+
+    def cancel_fast_forward(self):
+        if self.ff is not None:
+            self.ff["cancelled"] = True
+
+    def fast_forward_done(self, res, reason):
+        ff, self.ff = self.ff, None
+        self.ff_progress.pack_forget()
+        self.ff_cancel.pack_forget()
+        if res is not None:
+            self.log_day(res)
+        why = f" ({reason})" if reason else ""
+        self.add_log(f"⏩ Fast-forwarded {ff['done']} days{why} in {ff['t_sim']:.2f}s of simulation.")
+        self.refresh_view()
+        self.autosave()
+
+    # -------------------------------------------------------------------------
+
+    def autosave(self):
+        if self.autosaver.error is not None:
+            self.add_log(f"⚠️ Autosave failed: {self.autosaver.error}")
+            self.autosaver.error = None
+        if self.autosaver.maybe_save(self.engine, self.portfolio, self.bank):
+            self.add_log(f"💾 Autosaving day {self.engine.day}...", LOG_DETAIL)
+
+    def save_state(self):
+        try:
+            self.autosaver.save_now(self.engine, self.portfolio, self.bank)
+        except OSError as exc:
+            messagebox.showerror("Error", f"Could not save: {exc}", parent=self)
+            return
+        self.add_log(f"💾 Game saved to {self.save_path}.")
+
+    def toggle_overlay(self):
+        if self.overlay_job is not None:
+            self.after_cancel(self.overlay_job)
+            self.overlay_job = None
+            self.overlay.place_forget()
+            return
+        if not PROFILER.enabled:
+            PROFILER.enable()
+            self.add_log("⏱️ Instrumentation enabled.")
+        self.overlay.place(relx=1.0, x=-12, y=12, anchor="ne")
+        self.update_overlay()
+
+    def update_overlay(self):
+        self.overlay.config(text=PROFILER.report())
+        self.overlay.lift()
+        self.overlay_job = self.after(OVERLAY_MS, self.update_overlay)
+
+    def dump_profile(self):
+        if not PROFILER.frames:
+            self.add_log("⏱️ Start with --profile-frames N to capture cProfile data.")
+            return
+        path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.pstats"))
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        count = PROFILER.dump(path)
+        self.add_log(f"⏱️ Wrote cProfile stats for the last {count} frames to {path}.")
+
+    def export_ledger(self):
+        ledger = self.portfolio.ledger
+        try:
+            os.makedirs(os.path.dirname(LEDGER_PATH), exist_ok=True)
+            count = ledger.export(LEDGER_PATH)
+        except OSError as exc:
+            messagebox.showerror("Error", f"Could not export ledger: {exc}", parent=self)
+            return
+        self.add_log(f"📒 {count} trades ({ledger.method} cost basis, realized "
+                     f"${ledger.realized.sum():,.2f}) exported to {LEDGER_PATH}.")
+
+    def load_state(self):
+        if self.ff is not None:
+            return
+        try:
+            engine, portfolio, bank = load_game(self.save_path, self.universe)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Error", f"Could not load: {exc}", parent=self)
+            return
+        self.engine, self.portfolio, self.bank = engine, portfolio, bank
+        if self.loader is not None:
+            # Startup quotes belong to the game that was just replaced
+            self.loader = None
+            self.set_advance_enabled(True)
+        self.autosaver.last_day = engine.day
+        self.portfolio.dirty.update(self.universe)
+        if self.chart is not None:
+            self.chart.key = None
+        self.add_log(f"📂 Loaded saved game from {self.save_path} (day {engine.day}).")
+        self.refresh_view()
+
+    def log_day(self, res):
+        if res.date is not None:
+            self.add_log(f"\n=== Day {res.day} · {res.date} ===")
+        else:
+            self.add_log(f"\n=== Day {res.day} ===")
+        symbols = self.engine.symbols
+        if res.event is not None:
+            self.add_log(f"💥 {res.event['name']} – {res.event['desc']}")
+        for event, n, days in res.ongoing:
+            self.add_log(f"💥 {event['name']} continues (day {n} of {days}).")
+        if res.replay_end:
+            self.add_log(f"📼 The replay data ends on {res.date}; prices no longer move.")
+        elif res.date is not None and self.game_log.enabled(LOG_DETAIL):
+            for i, factor in zip(res.changed, res.factors):
+                sym, old = symbols[i], res.old_prices[i]
+                self.add_log(f"{STOCK_GRAPHICS.get(sym,'')} {sym} close: {(factor-1)*100:+.1f}% (${old:.2f}→${old*factor:.2f})", LOG_DETAIL)
+        elif self.game_log.enabled(LOG_DETAIL):
+            for i, factor in zip(res.changed, res.factors):
+                sym, old = symbols[i], res.old_prices[i]
+                new = max(old * factor, old)
+                if res.event is not None:
+                    self.add_log(f"    {STOCK_GRAPHICS.get(sym,'')} {sym}: +{(factor-1)*100:.1f}% (${old:.2f}→${new:.2f})", LOG_DETAIL)
+                else:
+                    self.add_log(f"{STOCK_GRAPHICS.get(sym,'')} {sym} daily growth: +{(factor-1)*100:+.1f}% (${old:.2f}→${new:.2f})", LOG_DETAIL)
+        if res.new_hint is not None:
+            _, hint_sym, friend = res.new_hint
+            self.add_log(f"💬 Your friend {friend} whispers: \"I heard {STOCK_GRAPHICS.get(hint_sym,'')} {hint_sym} will jump in {HINT_DELAY} days!\"")
+        if res.hint_hit is not None:
+            sym, friend, boost, old, new = res.hint_hit
+            self.add_log(f"🚀 {friend}'s tip comes true! {STOCK_GRAPHICS.get(sym,'')} {sym} jumps +{boost*100:.1f}% (${old:.2f}→${new:.2f})")
+        if res.interest:
+            self.add_log("Bank interest applied.")
+        if res.loan_interest > 0:
+            self.add_log(f"💸 Loan interest applied: ${res.loan_interest:.2f}")
+        if res.dividends > 0:
+            self.add_log(f"💰 Dividends paid on your shares: ${res.dividends:,.2f}")
+
+    # -------------------------------------------------------------------------
+
+    def set_label(self, label, text):
+        if self.label_cache.get(label) != text:
+            self.label_cache[label] = text
+            label.config(text=text)
+            PROFILER.count("labels.updated")
+
+    def row_values(self, sym):
+        i = self.engine.index[sym]
+        ledger = self.portfolio.ledger
+        shares   = int(ledger.position[i])
+        paid     = ledger.basis[i]
+        avg_paid = paid / shares if shares else 0.0
+        price    = self.engine.prices[i]
+        value    = shares * price
+        gain     = value - paid
+        return (
+            STOCK_GRAPHICS.get(sym,""),
+            sym,
+            self.universe[sym],
+            shares,
+            f"${avg_paid:.2f}",
+            f"${paid:.2f}",
+            f"${price:.2f}",
+            f"${value:.2f}",
+            f"${gain:.2f}",
+            f"${ledger.realized[i]:.2f}"
+        )
+
+    def update_row_order(self):
+        held = {self.portfolio.symbols[i] for i in np.flatnonzero(self.portfolio.holdings)}
+        if held == self.held:
+            return
+        for sym in self.held - held:
+            # A closed position that is not on screen has no reason to exist
+            if sym in self.row_cache and sym not in self.shown:
+                self.tree.delete(sym)
+                del self.row_cache[sym]
+        self.held = held
+        self.row_order = ([sym for sym in self.universe if sym in held] +
+                          [sym for sym in self.universe if sym not in held])
+
+    def sync_table(self):
+        self.update_row_order()
+        total = len(self.row_order)
+        self.table_top = max(0, min(self.table_top, total - TABLE_ROWS))
+        want = self.row_order[self.table_top:self.table_top + TABLE_ROWS]
+        if want != self.shown:
+            keep = set(want)
+            created = deleted = 0
+            for sym in self.shown:
+                if sym in keep:
+                    continue
+                if sym in self.held:
+                    self.tree.detach(sym)      # held rows stay materialized
+                else:
+                    self.tree.delete(sym)
+                    del self.row_cache[sym]
+                    deleted += 1
+            for pos, sym in enumerate(want):
+                if sym in self.row_cache:
+                    self.tree.move(sym, "", pos)
+                else:
+                    values = self.row_values(sym)
+                    self.tree.insert("", pos, iid=sym, values=values)
+                    self.row_cache[sym] = values
+                    created += 1
+            self.shown = want
+            PROFILER.count("tree.rows_created", created)
+            PROFILER.count("tree.rows_deleted", deleted)
+        if total:
+            self.tree_scroll.set(self.table_top / total,
+                                 min(1.0, (self.table_top + TABLE_ROWS) / total))
+
+    def scroll_table(self, *args):
+        if args[0] == "moveto":
+            self.table_top = int(float(args[1]) * len(self.row_order))
+        elif args[0] == "scroll":
+            step = TABLE_ROWS if args[2] == "pages" else 1
+            self.table_top += int(args[1]) * step
+        self.sync_table()
+        return "break"
+
+    @instrumented("refresh_view")
+    def refresh_view(self):
+        self.set_label(self.lbl_day, f"Day {self.engine.day}")
+        self.set_label(self.lbl_cash, f"💵 Cash: ${self.portfolio.cash:,.2f}")
+        self.set_label(self.lbl_bank, f"🏦 Bank: ${self.bank.balance:,.2f}")
+        self.set_label(self.lbl_loan, f"💳 Loan: ${self.bank.loan:,.2f}")
+        net = net_worth(self.portfolio, self.bank, self.engine)
+        self.set_label(self.lbl_networth, f"🌍 Net Worth: ${net:,.2f} / ${TARGET_NET_WORTH:,.2f}")
+
+        # Only materialized rows whose price or position changed are
+        # reformatted, and only the cells whose text differs are pushed
+        self.sync_table()
+        moved, traded = self.engine.dirty, self.portfolio.dirty
+        index = self.engine.index
+        cells = 0
+        for sym, old in self.row_cache.items():
+            if not (moved[index[sym]] or sym in traded):
+                continue
+            values = self.row_values(sym)
+            for col, new_val, old_val in zip(self.tree_cols, values, old):
+                if new_val != old_val:
+                    self.tree.set(sym, col, new_val)
+                    cells += 1
+            self.row_cache[sym] = values
+        PROFILER.count("tree.cells_updated", cells)
+        traded.clear()
+        moved[:] = False
+        self.draw_chart()
+
+    @instrumented("draw_chart")
+    def draw_chart(self):
+        if self.chart is None:
+            return
+        self.chart.show(self.engine.history, self.chart_sym, self.zoom_var.get())
+
+    @instrumented("add_log")
+    def add_log(self, msg, level=LOG_INFO):
+        self.game_log.add(msg, level)
+
+    # -------------------------------------------------------------------------
+
+    @instrumented("on_stock_double_click")
+    def on_stock_double_click(self, event):
+        sym = self.tree.focus()
+        if not sym:
+            return
+        price = self.engine.price(sym)
+        action = simpledialog.askstring("Buy / Sell",
+                                        "Enter 'B' to buy, 'S' to sell:",
+                                        initialvalue="B", parent=self)
+        if not action:
+            return
+        action = action.upper()
+        if action not in ("B", "S"):
+            messagebox.showerror("Error", "Invalid choice (must be B or S).", parent=self)
+            return
+        try:
+            shares = int(simpledialog.askstring("Shares", "How many shares?", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid number of shares.", parent=self)
+            return
+        if shares <= 0:
+            messagebox.showerror("Error", "Shares must be positive.", parent=self)
+            return
+
+        if action == "B":
+            ok, msg = self.portfolio.buy(sym, shares, price, self.engine.day)
+        else:
+            ok, msg = self.portfolio.sell(sym, shares, price, self.engine.day)
+
+        if ok:
+            self.add_log(msg)
+        else:
+            messagebox.showerror("Error", msg, parent=self)
+        self.refresh_view()
+
+    # -------------------------------------------------------------------------
+
+    @instrumented("bank_deposit")
+    def bank_deposit(self):
+        try:
+            amt = float(simpledialog.askstring("Deposit", "Amount?", initialvalue="100", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid amount.", parent=self)
+            return
+        ok, msg = self.bank.deposit(amt, self.portfolio.cash)
+        if ok:
+            self.portfolio.cash -= amt
+            self.add_log(msg)
+        else:
+            messagebox.showerror("Error", msg, parent=self)
+        self.refresh_view()
+
+    @instrumented("bank_withdraw")
+    def bank_withdraw(self):
+        try:
+            amt = float(simpledialog.askstring("Withdraw", "Amount?", initialvalue="100", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid amount.", parent=self)
+            return
+        ok, msg = self.bank.withdraw(amt)
+        if ok:
+            self.portfolio.cash += amt
+            self.add_log(msg)
+        else:
+            messagebox.showerror("Error", msg, parent=self)
+        self.refresh_view()
+
+    @instrumented("bank_borrow")
+    def bank_borrow(self):
+        try:
+            amt = float(simpledialog.askstring("Borrow", "Amount to borrow (max $100,000)?",
+                                               initialvalue="1000", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid amount.", parent=self)
+            return
+        ok, msg = self.bank.borrow(amt)
+        if ok:
+            self.portfolio.cash += amt
+            self.add_log(msg)
+        else:
+            messagebox.showerror("Error", msg, parent=self)
+        self.refresh_view()
+
+    @instrumented("bank_repay")
+    def bank_repay(self):
+        try:
+            amt = float(simpledialog.askstring("Repay Loan", "Amount to repay?",
+                                               initialvalue="1000", parent=self))
+        except Exception:
+            messagebox.showerror("Error", "Invalid amount.", parent=self)
+            return
+        ok, msg = self.bank.repay(amt, self.portfolio.cash)
+        if ok:
+            self.portfolio.cash -= min(amt, self.bank.loan + amt)
+            self.add_log(msg)
+        else:
+            messagebox.showerror("Error", msg, parent=self)
+        self.refresh_view()
+
+# --------------------- run -----------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stock Treasure Game")
+    sub = parser.add_subparsers(dest="command")
+    sim = sub.add_parser("simulate", help="run seeded headless games to evaluate a strategy")
+    sim.add_argument("--strategy", default="all",
+                     help=f"one of {', '.join(STRATEGIES)}, 'all' or module:function (default: all)")
+    sim.add_argument("--games", type=int, default=10000)
+    sim.add_argument("--seed", type=int, default=0)
+    sim.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    sim.add_argument("--max-days", type=int, default=SIM_MAX_DAYS)
+    sim.add_argument("--json", action="store_true", help="print the summary as JSON")
+    sim.add_argument("--replay", metavar="PATH", default=None,
+                     help="play recorded closes (CSV or Parquet export) instead of random growth")
+    sim.add_argument("--replay-start", metavar="YYYY-MM-DD", default=None,
+                     help="start every game on this date (default: a seeded random day)")
+    parser.add_argument("--stub-prices", type=float, metavar="LATENCY", default=None,
+                        help="use a local fake price source with LATENCY seconds per request")
+    parser.add_argument("--stub-fail-rate", type=float, metavar="P", default=0.0,
+                        help="make that fake source fail this fraction of requests (default: %(default)s)")
+    parser.add_argument("--live", type=float, metavar="SECONDS", default=0,
+                        help="keep refreshing quotes in the background every SECONDS (F5 refreshes now)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed the market simulation for a reproducible game")
+    parser.add_argument("--universe", metavar="CSV", default=None,
+                        help="watchlist file with symbol,name[,graphic] rows (default: built-in 30 stocks)")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="advance through recorded closes (CSV or Parquet export, e.g. from "
+                             "yfinance) instead of simulated growth; sets the universe unless --universe is given")
+    parser.add_argument("--replay-start", metavar="YYYY-MM-DD", default=None,
+                        help="first trading day to replay (default: the first in the file)")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=None,
+                        help=f"'info' drops the per-symbol daily lines (default: detail, "
+                             f"or info for more than {LOG_DETAIL_MAX_SYMBOLS} symbols)")
+    parser.add_argument("--no-log-file", action="store_true",
+                        help=f"do not write the game log to {LOG_PATH}")
+    parser.add_argument("--load", metavar="PATH", default=None,
+                        help="resume a saved game instead of starting a new one")
+    parser.add_argument("--save-path", metavar="PATH", default=SAVE_PATH,
+                        help="file used by Save, Load and autosave (default: %(default)s)")
+    parser.add_argument("--autosave-days", type=int, metavar="N", default=0,
+                        help="save in the background every N days (default: off)")
+    parser.add_argument("--cost-basis", choices=COST_BASIS_METHODS, default="average",
+                        help="how realized gains are measured on sales (default: %(default)s)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record handler timings from the start (F9 shows them)")
+    parser.add_argument("--profile-frames", type=int, metavar="N", default=0,
+                        help="keep cProfile data for the last N handler calls (F10 dumps it)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import and initialization timings once the window is drawn")
+    parser.add_argument("--offline", action="store_true",
+                        help="start from cached prices only, without any network access")
+    parser.add_argument("--cache-ttl", type=float, metavar="HOURS", default=CACHE_TTL / 3600,
+                        help="refetch cached prices older than this (default: %(default)g)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="neither read nor write the local price cache")
+    args = parser.parse_args(argv)
+    if args.live and (args.offline or args.replay):
+        parser.error("--live cannot be combined with --offline or --replay")
+    if args.command == "simulate":
+        if args.games < 1:
+            parser.error("--games must be at least 1")
+        if args.strategy != "all":
+            # Resolve once here so a typo is a usage error, not a worker traceback
+            try:
+                resolve_strategy(args.strategy)
+            except (ValueError, ImportError, AttributeError) as exc:
+                parser.error(f"--strategy: {exc}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "simulate":
+        return simulate_main(args)
+    if args.instrument or args.profile_frames:
+        PROFILER.enable(frames=args.profile_frames)
+    universe = load_universe(args.universe) if args.universe else STOCKS
+    replay = None
+    if args.replay:
+        path = replay_store(args.replay)
+        if args.universe:
+            replay = ReplayFeed(path, universe, start=args.replay_start)
+        else:
+            replay = ReplayFeed(path, start=args.replay_start)
+            universe = {sym: STOCKS.get(sym, sym) for sym in replay.symbols}
+    log_level = args.log_level or ("detail" if len(universe) <= LOG_DETAIL_MAX_SYMBOLS else "info")
+    source = yfinance_quote
+    if args.stub_prices is not None:
+        source = StubPriceSource(latency=args.stub_prices, fail_rate=args.stub_fail_rate)
+    cache = None if args.no_cache else PriceCache(ttl=args.cache_ttl * 3600)
+    game = StockTreasureGame(universe=universe, price_source=source, cache=cache,
+                             offline=args.offline, seed=args.seed, log_level=LOG_LEVELS[log_level],
+                             log_path=None if args.no_log_file else LOG_PATH,
+                             load_path=args.load, save_path=args.save_path,
+                             autosave_days=args.autosave_days, cost_basis=args.cost_basis,
+                             profile_startup=args.profile_startup, replay=replay,
+                             live_interval=args.live)
+    try:
+        game.mainloop()
+    finally:
+        if game.live is not None:
+            game.live.close()
+        game.autosaver.close()
+        game.game_log.close()
+
+if __name__ == "__main__":
+    main()
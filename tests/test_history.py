@@ -0,0 +1,15 @@
+import numpy as np
+
+import stocks
+
+
+def test_set_last_keeps_extremes_exact():
+    rng = np.random.default_rng(3)
+    hist = stocks.PriceHistory(["A", "B"], np.array([5.0, 5.0]))
+    for _ in range(200):
+        if rng.random() < 0.3:
+            hist.append(rng.integers(1, 10, size=2).astype(float))
+        hist.set_last(int(rng.integers(2)), float(rng.integers(1, 10)))
+        data = hist.data[:hist.length]
+        assert (hist.mins == data.min(axis=0)).all()
+        assert (hist.maxs == data.max(axis=0)).all()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import stocks
+
+
+def trade(method):
+    portfolio = stocks.Portfolio(symbols=stocks.STOCKS, cost_basis=method)
+    portfolio.buy("AAPL", 10, 10.0, day=1)
+    portfolio.buy("AAPL", 10, 20.0, day=2)
+    portfolio.sell("AAPL", 15, 30.0, day=3)
+    return portfolio
+
+
+def test_fifo_sells_oldest_lots_first():
+    portfolio = trade("fifo")
+    i = portfolio.index["AAPL"]
+    # 10 @ 10 then 5 of the lot @ 20
+    assert portfolio.ledger.realized[i] == pytest.approx(10 * 20 + 5 * 10)
+    assert portfolio.total_paid[i] == pytest.approx(5 * 20.0)
+    assert portfolio.ledger.open_lots("AAPL", 30.0) == [(2, 5, 20.0, pytest.approx(0.5))]
+
+
+def test_average_cost_spreads_basis():
+    portfolio = trade("average")
+    i = portfolio.index["AAPL"]
+    assert portfolio.ledger.realized[i] == pytest.approx(15 * (30 - 15))
+    assert portfolio.total_paid[i] == pytest.approx(5 * 15.0)
+    assert portfolio.avg_cost()[i] == pytest.approx(15.0)
+    # The shares left are still the day-2 ones, but at the average cost
+    assert portfolio.ledger.open_lots("AAPL", 30.0) == [(2, 5, pytest.approx(15.0), pytest.approx(1.0))]
+
+
+@pytest.mark.parametrize("method", stocks.COST_BASIS_METHODS)
+def test_open_lots_add_up_to_basis(method):
+    portfolio = trade(method)
+    portfolio.buy("AAPL", 4, 40.0, day=4)
+    ledger = portfolio.ledger
+    lots = ledger.open_lots("AAPL", 30.0)
+    assert sum(shares for _, shares, _, _ in lots) == portfolio.shares("AAPL")
+    assert sum(shares * cost for _, shares, cost, _ in lots) == pytest.approx(ledger.basis[ledger.symbols.index("AAPL")])
+
+
+@pytest.mark.parametrize("method", stocks.COST_BASIS_METHODS)
+def test_methods_agree_once_flat(method):
+    portfolio = trade(method)
+    portfolio.sell("AAPL", 5, 12.0, day=4)
+    i = portfolio.index["AAPL"]
+    assert portfolio.shares("AAPL") == 0
+    assert portfolio.total_paid[i] == 0.0
+    # Over a closed position both methods realize proceeds minus cost
+    assert portfolio.ledger.realized[i] == pytest.approx(15 * 30 + 5 * 12 - (100 + 200))
+    assert portfolio.cash == pytest.approx(stocks.STARTING_CASH + np.sum(portfolio.ledger.pnl))
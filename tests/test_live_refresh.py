@@ -0,0 +1,88 @@
+import threading
+import time
+
+import stocks
+
+SYMBOLS = [f"S{i:02d}" for i in range(8)]
+
+
+class Recorder:
+    """Wraps a quote source and records calls and per-symbol concurrency."""
+
+    def __init__(self, source):
+        self.source = source
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.active = {}
+        self.overlaps = 0
+
+    def __call__(self, sym, timeout):
+        with self.lock:
+            self.calls[sym] = self.calls.get(sym, 0) + 1
+            self.active[sym] = self.active.get(sym, 0) + 1
+            self.overlaps += self.active[sym] > 1
+        try:
+            return self.source(sym, timeout)
+        finally:
+            with self.lock:
+                self.active[sym] -= 1
+
+
+def run_for(refresher, seconds, poke=0):
+    refresher.start()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        for _ in range(poke):
+            refresher.refresh_now()
+        time.sleep(0.02)
+    refresher.close()
+    refresher.thread.join(2)
+    return refresher.drain()
+
+
+def test_slow_rounds_coalesce_and_never_overlap():
+    source = Recorder(stocks.StubPriceSource(latency=0.3, seed=1))
+    refresher = stocks.LiveRefresher(SYMBOLS, source=source, interval=0.05, timeout=2.0)
+    results = run_for(refresher, 1.0, poke=3)
+    # Ticks every 50ms and ~150 refresh_now() calls, but 300ms rounds run back to back
+    assert 2 <= refresher.rounds <= 5
+    assert refresher.coalesced >= refresher.rounds
+    assert source.overlaps == 0
+    assert max(source.calls.values()) <= refresher.rounds + 1
+    batches = [batch for kind, batch, _ in results if kind == "prices"]
+    assert len(batches) == refresher.rounds
+    assert all(sorted(batch) == SYMBOLS for batch in batches)
+
+
+def test_timed_out_symbol_is_not_requested_again_while_in_flight():
+    source = Recorder(stocks.StubPriceSource(latency=0.5, seed=2))
+    refresher = stocks.LiveRefresher(SYMBOLS[:2], source=source, interval=0.05, timeout=0.1)
+    refresher.source = lambda sym, timeout: source(sym, 0.5)     # outlives the round timeout
+    run_for(refresher, 0.8)
+    assert source.overlaps == 0
+    assert all(n <= 2 for n in source.calls.values())
+
+
+def test_failures_back_off_and_recover(monkeypatch):
+    monkeypatch.setattr(stocks, "LIVE_BACKOFF_MAX", 0.2)
+    stub = stocks.StubPriceSource(latency=0.0, fail_rate=1.0, seed=3)
+    source = Recorder(stub)
+    refresher = stocks.LiveRefresher(SYMBOLS, source=source, interval=0.02, timeout=1.0).start()
+    time.sleep(0.6)
+    # Without backoff each symbol would have been asked ~30 times
+    assert refresher.rounds >= 10
+    assert max(source.calls.values()) <= 10
+    assert min(refresher.failures.values()) >= 2
+    errors = [batch for kind, batch, _ in refresher.drain() if kind == "errors"]
+    assert errors and all("simulated network failure" in msg for b in errors for msg in b.values())
+
+    stub.fail_rate = 0.0
+    time.sleep(0.5)
+    refresher.close()
+    assert refresher.failures == {}
+    assert refresher.retry_at == {}
+    prices = {}
+    for kind, batch, _ in refresher.drain():
+        if kind == "prices":
+            prices.update(batch)
+    assert sorted(prices) == SYMBOLS
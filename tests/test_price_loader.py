@@ -0,0 +1,36 @@
+import time
+
+import stocks
+
+SYMBOLS = [f"S{i:02d}" for i in range(30)]
+
+
+def run(loader):
+    loader.start().thread.join(timeout=5)
+    items = loader.drain()
+    assert items[-1][0] == "done"
+    return items[:-1]
+
+
+def test_whole_universe_in_one_round_trip():
+    t0 = time.monotonic()
+    items = run(stocks.PriceLoader(SYMBOLS, source=stocks.StubPriceSource(latency=0.3, seed=1)))
+    elapsed = time.monotonic() - t0
+    assert sorted(sym for kind, sym, _ in items if kind == "price") == SYMBOLS
+    assert elapsed < 0.6
+
+
+def test_failures_are_reported_per_symbol():
+    items = run(stocks.PriceLoader(SYMBOLS, source=stocks.StubPriceSource(latency=0.0, fail_rate=1.0)))
+    assert {kind for kind, _, _ in items} == {"error"}
+    assert sorted(sym for _, sym, _ in items) == SYMBOLS
+
+
+def test_slow_quotes_time_out():
+    stub = stocks.StubPriceSource(latency=0.5)
+    slow = lambda sym, timeout: stub(sym, 5.0)     # a source that ignores its timeout
+    t0 = time.monotonic()
+    items = run(stocks.PriceLoader(SYMBOLS, source=slow, timeout=0.1))
+    assert time.monotonic() - t0 < 0.45
+    assert {kind for kind, _, _ in items} == {"timeout"}
+    assert sorted(sym for _, sym, _ in items) == SYMBOLS
@@ -0,0 +1,144 @@
+import csv
+import datetime
+
+import numpy as np
+import pytest
+
+import stocks
+
+
+def trading_days(n, start=datetime.date(2020, 1, 2)):
+    days, day = [], start
+    while len(days) < n:
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def test_single_ticker_ohlcv_export(tmp_path):
+    path = tmp_path / "aapl.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date", "Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"])
+        for k, day in enumerate(trading_days(5)):
+            w.writerow([f"{day} 00:00:00-05:00", 1, 2, 0.5, 100.0 + k, 5_000_000, 0, 0])
+    feed = stocks.ReplayFeed(stocks.replay_store(str(path)))
+    assert feed.symbols == ["AAPL"]
+    assert feed.prices.tolist() == [100.0]
+    assert [float(feed.next_row()[0]) for _ in range(4)] == [101.0, 102.0, 103.0, 104.0]
+
+
+def test_wide_file_with_field_like_tickers(tmp_path):
+    path = tmp_path / "wide.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date", "LOW", "OPEN"])
+        for k, day in enumerate(trading_days(3)):
+            w.writerow([day.isoformat(), 200.0 + k, 5.0 + k])
+    feed = stocks.ReplayFeed(stocks.replay_store(str(path)))
+    assert feed.symbols == ["LOW", "OPEN"]
+    assert feed.prices.tolist() == [200.0, 5.0]
+
+
+def test_failed_build_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "w.csv"
+    days = trading_days(3)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date", "AAA"])
+        for day in (days[1], days[0], days[2]):
+            w.writerow([day.isoformat(), 10.0])
+    with pytest.raises(ValueError, match="not sorted"):
+        stocks.replay_store(str(path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["w.csv"]
+
+
+def write_layouts(tmp_path, days, symbols, closes):
+    cell = lambda c: "" if np.isnan(c) else repr(float(c))
+    with open(tmp_path / "long.csv", "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date", "Ticker", "Open", "Close", "Volume"])
+        for day, row in zip(days, closes):
+            for sym, c in zip(symbols, row):
+                if not np.isnan(c):
+                    w.writerow([day.isoformat(), sym, 1, repr(float(c)), 100])
+    with open(tmp_path / "wide.csv", "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date"] + symbols)
+        for day, row in zip(days, closes):
+            w.writerow([day.isoformat()] + [cell(c) for c in row])
+    with open(tmp_path / "yf.csv", "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Price"] + ["Close"] * len(symbols) + ["Volume"] * len(symbols))
+        w.writerow(["Ticker"] + symbols + symbols)
+        w.writerow(["Date"] + [""] * (2 * len(symbols)))
+        for day, row in zip(days, closes):
+            w.writerow([f"{day} 00:00:00+00:00"] + [cell(c) for c in row] + ["100"] * len(symbols))
+    return [str(tmp_path / name) for name in ("long.csv", "wide.csv", "yf.csv")]
+
+
+def naive_fill(closes):
+    # Day by day: carry the last close forward, and before a symbol's first
+    # quote use that first quote
+    out = closes.copy()
+    for k in range(1, len(out)):
+        gaps = np.isnan(out[k])
+        out[k, gaps] = out[k - 1, gaps]
+    for col in out.T:
+        col[np.isnan(col)] = col[~np.isnan(col)][0]
+    return out
+
+
+def test_chunked_fill_matches_day_by_day_fill(tmp_path):
+    rng = np.random.default_rng(0)
+    days = trading_days(600)
+    symbols = [f"T{i:02d}" for i in range(12)]
+    closes = np.cumprod(rng.lognormal(0, 0.02, (len(days), len(symbols))), axis=0) * 50
+    closes[rng.random(closes.shape) < 0.05] = np.nan
+    closes[:150, 3] = np.nan            # lists late
+    closes[400:, 7] = np.nan            # stops trading
+    expected = naive_fill(closes)
+
+    for path in write_layouts(tmp_path, days, symbols, closes):
+        feed = stocks.ReplayFeed(stocks.replay_store(path), chunk_days=64)
+        assert feed.symbols == symbols
+        rows = [feed.prices.copy()]
+        while (row := feed.next_row()) is not None:
+            rows.append(row.copy())
+        assert np.allclose(rows, expected), path
+
+        start = days[333] + datetime.timedelta(days=1)    # may fall on a weekend
+        feed = stocks.ReplayFeed(stocks.replay_store(path), start=start.isoformat(), chunk_days=64)
+        assert feed.cursor == int(np.searchsorted([d.toordinal() for d in days], start.toordinal()))
+        assert np.allclose(feed.prices, expected[feed.cursor])
+        feed = stocks.ReplayFeed(stocks.replay_store(path), symbols=["T07", "T03"], start=days[20].isoformat())
+        assert np.allclose(feed.prices, expected[20, [7, 3]])
+
+
+def test_stepping_past_the_end_of_a_replay(tmp_path):
+    path = tmp_path / "wide.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Date", "AAA", "BBB"])
+        for k, day in enumerate(trading_days(4)):
+            w.writerow([day.isoformat(), 10.0 + k, 20.0])
+    feed = stocks.ReplayFeed(stocks.replay_store(str(path)))
+    bank, portfolio = stocks.Bank(), stocks.Portfolio(symbols=feed.symbols)
+    engine = stocks.MarketEngine(feed.symbols, bank=bank, seed=1, portfolio=portfolio)
+    engine.attach_replay(feed)
+    ends = []
+    for _ in range(6):
+        res = engine.step()
+        ends.append(res.replay_end)
+        # What log_day walks for every replayed day, including idle ones
+        assert res.date is not None and len(list(zip(res.changed, res.factors))) <= 2
+    assert ends == [False, False, False, True, False, False]
+    assert engine.prices.tolist() == [13.0, 20.0]
+    engine.advance(200)
+
+    save = str(tmp_path / "game.stk")
+    stocks.save_game(save, engine, portfolio, bank)
+    engine2, _, _ = stocks.load_game(save, feed.symbols)
+    assert engine2.replay_over
+    assert not engine2.step().replay_end
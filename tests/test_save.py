@@ -0,0 +1,34 @@
+import os
+import threading
+
+import stocks
+
+
+def test_concurrent_saves_never_share_a_temp_file(tmp_path):
+    bank, portfolio = stocks.Bank(), stocks.Portfolio()
+    engine = stocks.MarketEngine(stocks.STOCKS, bank=bank, seed=2, portfolio=portfolio)
+    engine.advance(50)
+    path = str(tmp_path / "game.stk")
+    saver = stocks.AutoSaver(path, every=1)
+    errors = []
+
+    def manual():
+        try:
+            for _ in range(20):
+                stocks.save_game(path, engine, portfolio, bank)
+        except Exception as exc:
+            errors.append(exc)
+
+    writers = [threading.Thread(target=manual) for _ in range(3)]
+    for t in writers:
+        t.start()
+    for _ in range(20):
+        saver.save(engine, portfolio, bank).result()
+        saver.save_now(engine, portfolio, bank)
+    for t in writers:
+        t.join()
+    saver.close()
+    assert errors == [] and saver.error is None
+    assert os.listdir(tmp_path) == ["game.stk"]
+    engine2, _, _ = stocks.load_game(path)
+    assert engine2.day == engine.day
@@ -0,0 +1,59 @@
+import numpy as np
+
+import stocks
+
+
+def test_entries_come_out_by_day_then_schedule_order():
+    sched = stocks.EventScheduler()
+    sched.schedule(5, "b")
+    sched.schedule(3, "a", sym=7)
+    sched.schedule(5, "c")
+    assert sched.next_due() == 3
+    assert sched.pending_for(7) == 1
+    assert sched.pop_due(2) == []
+    assert [kind for _, _, kind, _, _ in sched.pop_due(5)] == ["a", "b", "c"]
+    assert sched.pending_for(7) == 0
+    assert sched.next_due() is None
+
+
+def new_game(seed):
+    bank, portfolio = stocks.Bank(), stocks.Portfolio()
+    engine = stocks.MarketEngine(stocks.STOCKS, bank=bank, seed=seed, portfolio=portfolio)
+    portfolio.buy("MSFT", 10, engine.price("MSFT"), engine.day)
+    bank.borrow(1000.0)
+    return engine, portfolio, bank
+
+
+def test_save_mid_schedule_resumes_identically(tmp_path):
+    engine, portfolio, bank = new_game(7)
+    # Play until a tip and the rest of a multi-day event are both waiting
+    kinds = set()
+    while not {"hint", "event"} <= kinds:
+        engine.step()
+        kinds = {kind for _, kind, _, _ in engine.scheduler.entries()}
+    path = str(tmp_path / "game.stk")
+    stocks.save_game(path, engine, portfolio, bank)
+    engine2, portfolio2, bank2 = stocks.load_game(path)
+    assert engine2.scheduler.entries() == engine.scheduler.entries()
+
+    for _ in range(200):     # spans interest, loan interest and a dividend day
+        a, b = engine.step(), engine2.step()
+        assert (a.new_hint, a.hint_hit, a.interest) == (b.new_hint, b.hint_hit, b.interest)
+        assert [(e["name"], n) for e, n, _ in a.ongoing] == [(e["name"], n) for e, n, _ in b.ongoing]
+        assert (a.loan_interest, a.dividends) == (b.loan_interest, b.dividends)
+    assert np.array_equal(engine.prices, engine2.prices)
+    assert (portfolio.cash, bank.balance, bank.loan) == (portfolio2.cash, bank2.balance, bank2.loan)
+    assert engine.scheduler.entries() == engine2.scheduler.entries()
+
+
+def test_recurring_entries_fall_on_their_periods():
+    engine, portfolio, bank = new_game(1)
+    interest, dividends = [], []
+    for _ in range(2 * stocks.DIVIDEND_PERIOD):
+        res = engine.step()
+        if res.interest:
+            interest.append(res.day)
+        if res.dividends:
+            dividends.append(res.day)
+    assert interest == list(range(stocks.INTEREST_PERIOD, engine.day + 1, stocks.INTEREST_PERIOD))
+    assert dividends == [stocks.DIVIDEND_PERIOD, 2 * stocks.DIVIDEND_PERIOD]
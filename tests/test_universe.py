@@ -0,0 +1,25 @@
+import stocks
+
+
+def test_symbol_matches_rank_ahead_of_name_words():
+    universe = {f"S{i:04d}": f"Synthetic {i} Inc." for i in range(5000)}
+    universe.update({"INCY": "Incyte Corp", "INTC": "Intel Corp"})
+    index = stocks.SymbolIndex(universe)
+    assert index.search("INC")[0] == "INCY"
+    assert index.search("IN")[:2] == ["INCY", "INTC"]
+    assert index.search("intel")[0] == "INTC"
+
+
+def test_exact_symbol_first():
+    index = stocks.SymbolIndex(stocks.STOCKS)
+    assert index.search("t")[:2] == ["T", "TSLA"]
+
+
+def test_events_without_targets_are_dropped():
+    universe = {f"S{i:02d}": f"Synthetic {i}" for i in range(50)}
+    engine = stocks.MarketEngine(universe, seed=1)
+    assert all(idx.size for _, idx in engine.events)
+    assert "AI Breakthrough!" not in [event["name"] for event, _ in engine.events]
+    for _ in range(500):
+        res = engine.step()
+        assert res.changed.size